@@ -0,0 +1,246 @@
+from bparser.Tokenizer import Tokenizer
+from bparser.boolparser import BooleanParser
+from bparser.dimacs import loadDIMAC
+from bparser.tseitin_generator import TseitinFormula
+from benchmarks.parser_benchmark import getWideFormula, getDeepFormula
+from datetime import datetime
+import argparse
+import csv
+import gc
+import glob
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+# usage (from src directory):
+# python -m benchmarks.benchmark_suite [--files ...] [--sizes ...] [--json results.json] [--csv results.csv]
+#                                      [--baseline benchmarks/baseline.json] [--save-baseline]
+# every phase is measured separately, the fastest of repeats is kept (solving runs only once),
+# phases which do not apply to the instance are None, e.g. CNF files are not tokenized nor parsed
+PHASES = ['load', 'tokenize', 'parse', 'encode', 'export', 'solve']
+DATA_PREFIXES = ['easy', 'medium', 'hard', 'very-hard']
+DEFAULT_SIZES = [10**3, 10**4, 10**5]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SEED = 2021
+
+
+# random formula with nested parentheses, the same for the same arguments
+def getRandomFormula(operators_num, vars_num=None, seed=SEED):
+    rng = random.Random(seed + operators_num)
+    vars_num = vars_num or max(operators_num // 4, 2)
+    operators = [' && ', ' || ', ' == ', ' != ']
+    parts = []
+    depth = 0
+    for idx in range(operators_num + 1):
+        if idx:
+            parts.append(rng.choice(operators))
+        if rng.random() < 0.2:
+            parts.append('!(' if rng.random() < 0.3 else '(')
+            depth += 1
+        parts.append(('!' if rng.random() < 0.3 else '') + f'x{rng.randrange(vars_num)}')
+        if depth and rng.random() < 0.2:
+            parts.append(')')
+            depth -= 1
+    parts.append(')' * depth)
+    return ''.join(parts)
+
+
+def getDataFiles():
+    data_dir = os.path.join(os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__))), 'data')
+    files = []
+    for prefix in DATA_PREFIXES:
+        files.extend(sorted(glob.glob(os.path.join(data_dir, f'{prefix}-*.cnf'))))
+    return files
+
+
+# returns the fastest time of repeats and result of the last call
+def measure(fn, repeats=1):
+    best_time = None
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+    return best_time, result
+
+
+# encoding includes simplification of parse tree, times are taken from phase statistics of the formula
+def measureEncoding(build, repeats=1):
+    best_time = None
+    for _ in range(repeats):
+        gc.collect()
+        formula = build()
+        elapsed = formula.phase_stats.getWallTime('simplify', 'encode')
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+    return best_time, formula
+
+
+# instance: (name, kind, value), value is a file path for 'file' and formula string for 'synthetic'
+def benchmarkInstance(instance, repeats=3, solve_timeout=10, solve=True):
+    name, kind, value = instance
+    result = dict.fromkeys(PHASES)
+    result.update({'instance': name, 'kind': kind, 'terms': None, 'clauses': None, 'status': None})
+
+    text = value
+    if kind == 'file':
+        if value.endswith('.txt'):
+            result['load'], text = measure(lambda: TseitinFormula.getFromulaFromTxt(value), repeats)
+        else:
+            result['load'], _ = measure(lambda: loadDIMAC(value), repeats)
+            text = None
+
+    if text is None:
+        result['encode'], formula = measureEncoding(
+            lambda: TseitinFormula(value, formula_format='file', use_solver=False), repeats)
+    else:
+        result['tokenize'], _ = measure(lambda: Tokenizer(text).tokenize(), repeats)
+        result['parse'], _ = measure(lambda: BooleanParser(text), repeats)
+        result['encode'], formula = measureEncoding(lambda: TseitinFormula(text, use_solver=False), repeats)
+
+    result['terms'] = len(formula.terms)
+    result['clauses'] = len(formula.clauses)
+
+    with tempfile.TemporaryDirectory() as directory:
+        target = os.path.join(directory, 'formula.cnf')
+        result['export'], _ = measure(lambda: formula.export2CNF(target=target), repeats)
+
+    if solve:
+        result['solve'], _ = measure(lambda: formula.solve(
+            return_all_assignments=False, interrupt_time=solve_timeout))
+        result['status'] = formula.solver_status
+
+    return result
+
+
+def getInstances(files, sizes):
+    instances = [(os.path.basename(filepath), 'file', filepath) for filepath in files]
+    for size in sizes:
+        instances.append((f'wide-{size}', 'synthetic', getWideFormula(size)))
+        instances.append((f'deep-{size}', 'synthetic', getDeepFormula(size)))
+        instances.append((f'random-{size}', 'synthetic', getRandomFormula(size)))
+    return instances
+
+
+def getEnvironment(args):
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeats': args.repeats,
+        'solve_timeout': args.solve_timeout,
+        'seed': SEED
+    }
+
+
+# phase is a regression if it is slower than in baseline by more than tolerance (relative)
+# and min_delta seconds, so noise of very short phases is ignored
+def compareResults(results, baseline, tolerance=0.2, min_delta=0.02):
+    baseline_results = {result['instance']: result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        baseline_result = baseline_results.get(result['instance'])
+        if baseline_result is None:
+            continue
+        for phase in PHASES:
+            current, previous = result.get(phase), baseline_result.get(phase)
+            if current is None or previous is None:
+                continue
+            # solving interrupted by timeout is not comparable
+            if phase == 'solve' and 'UNKNOWN' in [result['status'], baseline_result['status']]:
+                continue
+            if current > previous * (1 + tolerance) and current - previous > min_delta:
+                regressions.append({
+                    'instance': result['instance'],
+                    'phase': phase,
+                    'baseline': previous,
+                    'current': current,
+                    'ratio': current / previous if previous else float('inf')
+                })
+    return regressions
+
+
+def writeJSON(filepath, report):
+    with open(filepath, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+def writeCSV(filepath, results):
+    columns = ['instance', 'kind'] + PHASES + ['terms', 'clauses', 'status']
+    with open(filepath, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def formatTime(value):
+    return '--' if value is None else f'{value:.4f}'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', nargs='*', default=None,
+                        help='formula files (txt, cnf, dnf), easy/medium/hard/very-hard data files by default')
+    parser.add_argument('--sizes', nargs='*', type=int, default=DEFAULT_SIZES,
+                        help='numbers of operators of synthetic formulas')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--solve-timeout', type=float, default=10)
+    parser.add_argument('--no-solve', action='store_true')
+    parser.add_argument('--json')
+    parser.add_argument('--csv')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store results as the new baseline instead of comparing with it')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='relative slowdown of phase reported as regression')
+    parser.add_argument('--min-delta', type=float, default=0.02,
+                        help='slowdown in seconds below which phase is never reported')
+    args = parser.parse_args()
+
+    files = args.files if args.files is not None else getDataFiles()
+    instances = getInstances(files, args.sizes)
+
+    print(f'{"instance":<22}' + ''.join(f'{phase + " [s]":>13}' for phase in PHASES) + f'{"clauses":>10}{"status":>9}')
+    results = []
+    for instance in instances:
+        result = benchmarkInstance(instance, args.repeats, args.solve_timeout, not args.no_solve)
+        results.append(result)
+        print(f'{result["instance"]:<22}' + ''.join(f'{formatTime(result[phase]):>13}' for phase in PHASES) +
+              f'{result["clauses"]:>10}{str(result["status"] or "--"):>9}', flush=True)
+
+    report = {'environment': getEnvironment(args), 'results': results}
+    if args.json:
+        writeJSON(args.json, report)
+    if args.csv:
+        writeCSV(args.csv, results)
+
+    if args.save_baseline:
+        writeJSON(args.baseline, report)
+        print(f'\nBaseline saved to \'{args.baseline}\'.')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'\nBaseline \'{args.baseline}\' does not exist, use --save-baseline to create it.')
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compareResults(results, baseline, args.tolerance, args.min_delta)
+    if not regressions:
+        print(f'\nNo regressions against baseline from {baseline["environment"]["date"]}.')
+        return 0
+
+    print(f'\nRegressions against baseline from {baseline["environment"]["date"]}:')
+    for regression in regressions:
+        print(f'{regression["instance"]:<22}{regression["phase"]:<10}{formatTime(regression["baseline"])} -> '
+              f'{formatTime(regression["current"])} ({regression["ratio"]:.2f}x)')
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
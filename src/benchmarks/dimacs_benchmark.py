@@ -0,0 +1,45 @@
+from bparser.dimacs import loadDIMAC
+import glob
+import os
+import sys
+import time
+
+
+# usage (from src directory): python -m benchmarks.dimacs_benchmark [files...]
+def benchmarkFile(filepath, repeats=3):
+    load_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        formula = loadDIMAC(filepath)
+        load_times.append(time.perf_counter() - start)
+
+    # infix rendering is the cost the string based path pays on top of loading
+    start = time.perf_counter()
+    formula.toInfixStr()
+    infix_time = time.perf_counter() - start
+
+    return {
+        'file': os.path.basename(filepath),
+        'size_mb': os.path.getsize(filepath) / 2**20,
+        'clauses': len(formula),
+        'literals': len(formula.literals),
+        'load_time': min(load_times),
+        'infix_time': infix_time
+    }
+
+
+def main(files):
+    if not files:
+        data_dir = os.path.join(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__))), 'data')
+        files = sorted(glob.glob(os.path.join(data_dir, '*.cnf')))
+
+    print(f'{"file":<22}{"MB":>8}{"clauses":>10}{"literals":>11}{"load [s]":>11}{"MB/s":>9}{"infix [s]":>11}')
+    for filepath in files:
+        result = benchmarkFile(filepath)
+        print(f'{result["file"]:<22}{result["size_mb"]:>8.2f}{result["clauses"]:>10}{result["literals"]:>11}'
+              f'{result["load_time"]:>11.4f}{result["size_mb"] / result["load_time"]:>9.1f}{result["infix_time"]:>11.4f}')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from urllib import request
+from urllib.error import HTTPError
+import argparse
+import json
+import time
+
+
+# usage (from src directory, with the server running):
+# python -m benchmarks.load_test --url http://localhost:5000/ --requests 200 --concurrency 16 [--unique]
+# --unique makes every formula different, so results are not served from cache
+def getFormula(idx, unique):
+    formula = '(a || b) && c || !(d && e) && (f || !g) && (h == i)'
+    return f'{formula} || x{idx}' if unique else formula
+
+
+def sendRequest(url, formula):
+    data = json.dumps({"cnf": formula}).encode()
+    req = request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with request.urlopen(req) as response:
+            response.read()
+            status = response.status
+    except HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 'connection error'
+    return status, time.perf_counter() - start
+
+
+def getPercentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://localhost:5000/')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--unique', action='store_true')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda idx: sendRequest(args.url, getFormula(idx, args.unique)),
+                                    range(args.requests)))
+    total_time = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in results)
+    latencies = [latency for status, latency in results if status == 200]
+
+    print(f'requests: {args.requests}, concurrency: {args.concurrency}, unique: {args.unique}')
+    print(f'total time: {total_time:.2f}s, throughput: {args.requests / total_time:.1f} req/s')
+    print(f'statuses: {dict(statuses)}')
+    print(f'latency of successful requests [s]: p50 {getPercentile(latencies, 50):.4f}, '
+          f'p95 {getPercentile(latencies, 95):.4f}, max {getPercentile(latencies, 100):.4f}')
+
+
+if __name__ == "__main__":
+    main()
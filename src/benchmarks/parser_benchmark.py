@@ -0,0 +1,50 @@
+from bparser.boolparser import BooleanParser
+import sys
+import time
+
+
+# usage (from src directory): python -m benchmarks.parser_benchmark [operators_num...]
+def getWideFormula(operators_num):
+    operators = [' and ', ' or ']
+    parts = ['x0']
+    for idx in range(1, operators_num + 1):
+        parts.append(operators[idx % 2])
+        parts.append(f'!x{idx}' if idx % 3 == 0 else f'x{idx}')
+    return ''.join(parts)
+
+
+# every operator opens new parenthesis level: (((x0 and x1) or x2) and x3) ...
+def getDeepFormula(operators_num):
+    operators = [' and ', ' or ']
+    parts = ['(' * operators_num, 'x0']
+    for idx in range(1, operators_num + 1):
+        parts.append(operators[idx % 2])
+        parts.append(f'x{idx})')
+    return ''.join(parts)
+
+
+def benchmarkFormula(formula, operators_num):
+    start = time.perf_counter()
+    parser = BooleanParser(formula)
+    parse_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parser.toString()
+    render_time = time.perf_counter() - start
+
+    return parse_time, render_time, operators_num / parse_time
+
+
+def main(sizes):
+    sizes = [int(size) for size in sizes] or [10**3, 10**4, 10**5, 10**6]
+
+    print(f'{"shape":<8}{"operators":>11}{"parse [s]":>12}{"toString [s]":>14}{"operators/s":>14}')
+    for operators_num in sizes:
+        for shape, generator in [('wide', getWideFormula), ('deep', getDeepFormula)]:
+            parse_time, render_time, throughput = benchmarkFormula(
+                generator(operators_num), operators_num)
+            print(f'{shape:<8}{operators_num:>11}{parse_time:>12.4f}{render_time:>14.4f}{throughput:>14.0f}')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
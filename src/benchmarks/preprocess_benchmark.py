@@ -0,0 +1,57 @@
+from bparser.tseitin_generator import TseitinFormula
+from solver.SATSolver import UNKNOWN
+import glob
+import os
+import sys
+import time
+
+
+# usage (from src directory): python -m benchmarks.preprocess_benchmark [files...]
+# every file is solved (first model only) with and without CNFPreprocessor, solving time includes preprocessing
+def benchmarkFile(filepath, interrupt_time=60):
+    formula = TseitinFormula(filepath, formula_format='file', use_solver=False)
+
+    times = {}
+    statuses = {}
+    for preprocess in [False, True]:
+        start = time.perf_counter()
+        formula.solve(return_all_assignments=False, interrupt_time=interrupt_time, preprocess=preprocess)
+        times[preprocess] = time.perf_counter() - start
+        statuses[preprocess] = formula.solver_status
+
+    if UNKNOWN not in statuses.values() and statuses[False] != statuses[True]:
+        raise RuntimeError(f'Preprocessing changed result of \'{filepath}\'!')
+
+    stats = formula.preprocess_stats
+    return {
+        'file': os.path.basename(filepath),
+        'clauses_before': stats['clauses_before'],
+        'clauses_after': stats['clauses_after'],
+        'vars_before': stats['vars_before'],
+        'vars_after': stats['vars_after'],
+        'preprocess_time': stats['time'],
+        'solve_time': times[False],
+        'preprocessed_solve_time': times[True],
+        'status': statuses[True] if statuses[True] != UNKNOWN else statuses[False]
+    }
+
+
+def main(files):
+    if not files:
+        data_dir = os.path.join(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__))), 'data')
+        files = sorted(glob.glob(os.path.join(data_dir, '*.cnf')))
+
+    print(f'{"file":<22}{"clauses":>17}{"vars":>15}{"prep [s]":>10}{"solve [s]":>11}{"with prep [s]":>15}'
+          f'{"saved [s]":>11}{"status":>9}')
+    for filepath in files:
+        result = benchmarkFile(filepath)
+        clauses = f'{result["clauses_before"]}->{result["clauses_after"]}'
+        variables = f'{result["vars_before"]}->{result["vars_after"]}'
+        print(f'{result["file"]:<22}{clauses:>17}{variables:>15}{result["preprocess_time"]:>10.3f}'
+              f'{result["solve_time"]:>11.3f}{result["preprocessed_solve_time"]:>15.3f}'
+              f'{result["solve_time"] - result["preprocessed_solve_time"]:>11.3f}{result["status"]:>9}')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
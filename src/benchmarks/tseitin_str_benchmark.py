@@ -0,0 +1,55 @@
+from bparser.tseitin_generator import TseitinFormula
+from benchmarks.parser_benchmark import getWideFormula
+import io
+import sys
+import time
+
+
+# usage (from src directory): python -m benchmarks.tseitin_str_benchmark [operators_num...]
+# previous implementation of TseitinFormula.getTseitinFormulaStr, kept only for comparison
+def getTseitinFormulaStrOld(formula):
+    tseitin_formula = []
+    names = formula.clauses.names
+    for clause in formula.clauses:
+        term_str = "("
+
+        for term_id in clause:
+            if term_id < 0:
+                term_str += "!"
+            term_str = term_str + names[abs(term_id) - 1] + " or "
+
+        # remove last 'or'
+        term_str = term_str[:-4]
+        term_str = term_str + ")"
+
+        tseitin_formula.append(term_str + " and ")
+
+    tseitin_formula[-1] = tseitin_formula[-1][:-5]
+    return "".join(tseitin_formula)
+
+
+def measure(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(sizes):
+    sizes = [int(size) for size in sizes] or [10**4, 10**5, 10**6]
+
+    print(f'{"operators":>11}{"clauses":>10}{"old [s]":>10}{"join [s]":>10}{"writer [s]":>12}{"speedup":>9}')
+    for operators_num in sizes:
+        formula = TseitinFormula(getWideFormula(operators_num), use_solver=False, flatten=False)
+
+        old_time, old_result = measure(lambda: getTseitinFormulaStrOld(formula))
+        new_time, new_result = measure(lambda: formula.getTseitinFormulaStr(split=False))
+        writer_time, _ = measure(lambda: formula.getTseitinFormulaStr(split=False, writer=io.StringIO()))
+        if old_result != new_result:
+            raise RuntimeError("Implementations return different formulas!")
+
+        print(f'{operators_num:>11}{len(formula.clauses):>10}{old_time:>10.4f}{new_time:>10.4f}'
+              f'{writer_time:>12.4f}{old_time / new_time:>9.2f}')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,32 +1,55 @@
+import re
 
 # TODO some of expression needs parenthesis on the beginning and the end, there is need to add additional validation
+
+# every token type has its own named group, alternatives are checked in order
+TOKEN_REGEX = re.compile(r'''
+    (?P<WS>\s+)
+    |(?P<VAL>\b(?:true|false|True|False)\b|\b[01]\b)
+    |(?P<AND>\b(?:AND|and)\b|&&)
+    |(?P<OR>\b(?:OR|or)\b|\|\|)
+    |(?P<NEQ>!=|~=)
+    |(?P<EQ>==)
+    |(?P<NOT>\b(?:NOT|not)\b|!|~)
+    |(?P<LP>\()
+    |(?P<RP>\))
+    |(?P<VAR>[a-zA-Z_]+[0-9]*(?!\w))
+    |(?P<ERROR>.)
+''', re.VERBOSE | re.DOTALL)
+
+OPERATOR_TYPES = frozenset(['AND', 'OR', 'NOT'])
+
+# size of single read from file-like input
+CHUNK_SIZE = 2**20
+
+
 class Tokenizer:
+    tokenMap = {
+        'VAL': 'VAL', 'val': 'VAL', False: 'VAL', True: 'VAL',
+        'VAR': 'VAR', 'var': 'VAR',
+        'EQ': 'EQ', 'eq': 'EQ', '==': 'EQ',
+        'NEQ': 'NEQ', 'neq': 'NEQ', '!=': 'NEQ', '~=': 'NEQ',
+        'LP': 'LP', '(': 'LP', 'lp': 'LP',
+        'RP': 'RP', ')': 'RP', 'rp': 'RP',
+        'AND': 'AND', 'and': 'AND', '&&': 'AND',
+        'OR': 'OR', 'or': 'OR', '||': 'OR',
+        'NOT': 'NOT', 'not': 'NOT', '~': 'NOT', '!': 'NOT'
+    }
+
     def __init__(self, exp):
-        # loogic formula
+        # loogic formula, string or file-like object
         self.expression = exp
 
-        # list of all found tokens in exp
+        # list of all found tokens in exp, filled only by tokenize()
         self.tokens = []
         self.tokenTypes = []
         self.i = 0
 
-        self.tokenMap = {
-            'VAL': 'VAL', 'val': 'VAL', False: 'VAL', True: 'VAL',
-            'VAR': 'VAR', 'var': 'VAR',
-            'EQ': 'EQ', 'eq': 'EQ', '==': 'EQ',
-            'NEQ': 'NEQ', 'neq': 'NEQ', '!=': 'NEQ', '~=': 'NEQ',
-            'LP': 'LP', '(': 'LP', 'lp': 'LP',
-            'RP': 'RP', ')': 'RP', 'rp': 'RP',
-            'AND': 'AND', 'and': 'AND', '&&': 'AND',
-            'OR': 'OR', 'or': 'OR', '||': 'OR',
-            'NOT': 'NOT', 'not': 'NOT', '~': 'NOT', '!': 'NOT'
-        }
-
     def getToken(self, token):
         return self.tokenMap[token]
 
     def isOperator(self, token):
-        return token in self.tokenMap.keys() and self.getToken(token) in ['AND', 'OR', 'NOT']
+        return self.tokenMap.get(token) in OPERATOR_TYPES
 
     def next(self):
         self.i += 1
@@ -56,31 +79,35 @@ class Tokenizer:
         return t == 'EQ' or t == 'NEQ'
 
     def tokenize(self):
-        import re
-        reg = re.compile(
-            r'(\btrue\b|\bfalse\b|\bTrue\b|\bFalse\b|\bAND\b|\band\b|&&|\bOR\b|\bor\b|\|\||\bNOT\b|\bnot\b|~|!|~=|!=|==|\(|\))')
-
-        # every symbol in the input expression should be separate element on list
-        self.tokens = reg.split(self.expression)
-
-        # remove '=' symbol from expression if it appears with '!'
-        for idx in range(len(self.tokens)):
-            if self.tokens[idx] == '!' and re.match('=.*', self.tokens[idx+1]):
-                self.tokens[idx] = '!='
-                self.tokens[idx+1] = self.tokens[idx+1][1:]
-            elif self.tokens[idx] == '~' and re.match('=.*', self.tokens[idx+1]):
-                self.tokens[idx] = '~='
-                self.tokens[idx+1] = self.tokens[idx+1][1:]
-
-        # remove white characters
-        self.tokens = [t.strip() for t in self.tokens if t.strip() != '']
-
-        for t in self.tokens:
-            if t == 'False' or t == 'false' or t == '0':
-                t = False
-            elif t == 'True' or t == 'true' or t == '1':
-                t = True
-            if not self.isOperator(t) and not (t == True or t == False) and re.search('^[a-zA-Z_]+[0-9]*$', t):
-                self.tokenTypes.append(self.getToken('var'))
-            else:
-                self.tokenTypes.append(self.getToken(t))
+        for token_type, token in self.iterTokens():
+            self.tokens.append(token)
+            self.tokenTypes.append(token_type)
+
+    # lazily yields (type, value) pairs, whitespaces are skipped
+    def iterTokens(self):
+        if isinstance(self.expression, str):
+            yield from self.scan(self.expression)
+            return
+
+        rest = ''
+        while True:
+            chunk = self.expression.read(CHUNK_SIZE)
+            if not chunk:
+                yield from self.scan(rest)
+                return
+
+            # tokens never contain whitespaces, so text is safely cut after the last one
+            text = rest + chunk
+            cut = max(text.rfind(' '), text.rfind('\n'), text.rfind('\t')) + 1
+            yield from self.scan(text[:cut])
+            rest = text[cut:]
+
+    def scan(self, text):
+        for match in TOKEN_REGEX.finditer(text):
+            token_type = match.lastgroup
+            if token_type == 'WS':
+                continue
+            if token_type == 'ERROR':
+                raise Exception(
+                    f'Unexpected symbol \'{match.group()}\' in formula')
+            yield token_type, match.group()
@@ -0,0 +1,94 @@
+from array import array
+from utils.clause_store import ClauseStore
+import json
+import mmap
+import os
+import struct
+import sys
+
+# binary file with Tseitin encoding:
+# header: magic, byte order, number of literals, number of offsets, size of metadata
+# literals: int32 array, offsets: int64 array (both aligned to 8 bytes)
+# metadata: UTF-8 JSON with variable names, clause_map, xor gates and other attributes of TseitinFormula
+MAGIC = b'TSEITIN1'
+HEADER = struct.Struct('<8s2s6xQQQ')
+BYTE_ORDERS = {'little': b'LE', 'big': b'BE'}
+
+
+def getPadding(size):
+    return -size % 8
+
+
+# formula: TseitinFormula after conversion to CNF
+def saveEncoding(formula, filepath):
+    clauses = formula.clauses
+    literals = memoryview(clauses.literals).cast('B')
+    offsets = memoryview(clauses.offsets).cast('B')
+
+    is_cnf_input = formula.dimacs is not None and formula.dimacs.formula_type == 'cnf'
+    metadata = json.dumps({
+        "names": clauses.names,
+        "clause_map": formula.clause_map,
+        "root_operand": formula.root_operand,
+        "original_terms": formula.getOriginalTerms(),
+        "eliminated_terms": formula.eliminated_terms,
+        "original_formula": None if is_cnf_input else formula.getOriginalFormulaStr(),
+        "is_cnf_input": is_cnf_input,
+        "encoding": formula.encoding,
+        "sharing_stats": formula.sharing_stats,
+        "xor_gates": formula.xor_gates,
+        "input_file": formula.inputFile
+    }).encode()
+
+    with open(filepath, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, BYTE_ORDERS[sys.byteorder], len(clauses.literals),
+                               len(clauses.offsets), len(metadata)))
+        file.write(literals)
+        file.write(bytes(getPadding(len(literals))))
+        file.write(offsets)
+        file.write(metadata)
+
+
+# returns ClauseStore and metadata dict (see saveEncoding)
+# if use_mmap is True, literals and offsets are read-only views of memory-mapped file (nothing is copied),
+# the file stays mapped until ClauseStore.close is called, otherwise they are loaded into arrays and clauses can be added
+def loadEncoding(filepath, use_mmap=True):
+    with open(filepath, 'rb') as file:
+        # empty file can not be memory-mapped
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            raise RuntimeError("File is not a Tseitin encoding file.")
+        if use_mmap:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = file.read()
+
+    try:
+        return readEncoding(data, use_mmap)
+    except Exception:
+        if use_mmap:
+            data.close()
+        raise
+
+
+def readEncoding(data, use_mmap):
+    magic, byte_order, literals_num, offsets_num, metadata_size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise RuntimeError("File is not a Tseitin encoding file.")
+    if byte_order != BYTE_ORDERS[sys.byteorder]:
+        raise RuntimeError("File was saved on platform with different byte order.")
+
+    literals_start = HEADER.size
+    literals_end = literals_start + literals_num * 4
+    offsets_start = literals_end + getPadding(literals_num * 4)
+    offsets_end = offsets_start + offsets_num * 8
+    if offsets_end + metadata_size != len(data):
+        raise RuntimeError("Tseitin encoding file is corrupted.")
+
+    with memoryview(data) as view:
+        metadata = json.loads(bytes(view[offsets_end:]).decode())
+        literals = view[literals_start:literals_end].cast('i')
+        offsets = view[offsets_start:offsets_end].cast('q')
+
+    if not use_mmap:
+        return ClauseStore(array('i', literals), array('q', offsets), names=metadata["names"]), metadata
+    return ClauseStore(literals, offsets, names=metadata["names"], buffer=data), metadata
@@ -4,215 +4,150 @@ from bparser.Tokenizer import *
 Grammar:
 {!}Expression --> AndTerm { OR AndTerm}+
 AndTerm --> Condition { AND Condition}+
-Condition --> {!}Terminal [!=,==] {!}Terminal | {!}Terminal | {!}(Expression)
+Condition --> {!}Operand [!=,==] {!}Operand | {!}Operand
+Operand --> Terminal | (Expression)
 Terminal --> Number or Variable
 """
 
 
 class TreeNode:
+    __slots__ = ('left', 'right', 'value', 'tokenType', 'negate')
+
     def __init__(self, token_type):
         self.left = None
         self.right = None
         self.value = None
         self.tokenType = token_type
         self.negate = False
-        self.carryover = []
 
 
 class BooleanParser:
+    # binding power of binary operators, negation always binds to the nearest operand
+    precedence = {'EQ': 3, 'NEQ': 3, 'AND': 2, 'OR': 1}
+
     def __init__(self, exp):
         self.root = None
         self.tokenizer = Tokenizer(exp)
-        self.tokenizer.tokenize()
         self.parse()
 
+    # non-recursive parser (shunting-yard), operands and pending operators are kept on explicit stacks
     def parse(self):
-        whole_expression_negated = False
-
-        if self.tokenizer.nextTokenType() == self.tokenizer.getToken('not'):
-            whole_expression_negated = True
-            self.tokenizer.next()
-
-            # additional check, first token negates only variable, not the whole formula
-            if self.tokenizer.nextTokenType() != self.tokenizer.getToken('lp'):
-                whole_expression_negated = False
-                # get back to previous node to avoid losing negation
-                self.tokenizer.prev()
-
-        self.root = self.parseExpression()
-        if whole_expression_negated:
-            self.root.negate = True
-            self.root.carryover.append[self.tokenizer.getToken('not')]
-
-    def parseExpression(self):
-        andTerm1 = self.parseAndTerm()
-
-        or_token_type = self.tokenizer.getToken('or')
-        while self.tokenizer.hasNext() and self.tokenizer.nextTokenType() == or_token_type:
-            self.tokenizer.next()
-            andTermX = self.parseAndTerm()
-            andTerm = TreeNode(or_token_type)
-            andTerm.left = andTerm1
-            andTerm.right = andTermX
-            andTerm1 = andTerm
-        return andTerm1
-
-    def parseAndTerm(self):
-        condition1 = self.parseCondition()
-
-        and_token_type = self.tokenizer.getToken('and')
-        while self.tokenizer.hasNext() and self.tokenizer.nextTokenType() == and_token_type:
-            self.tokenizer.next()
-            conditionX = self.parseCondition()
-            condition = TreeNode(and_token_type)
-            condition.left = condition1
-            condition.right = conditionX
-            condition1 = condition
-        return condition1
-
-    def parseCondition(self):
+        lp_token_type = self.tokenizer.getToken('lp')
+        rp_token_type = self.tokenizer.getToken('rp')
+        not_token_type = self.tokenizer.getToken('not')
+        val_token_type = self.tokenizer.getToken('val')
+        var_token_type = self.tokenizer.getToken('var')
+
+        operands = []
+        # binary operator types or (lp_token_type, negation) pairs for opened parenthesis
+        operators = []
+        expect_operand = True
         negation_queued = False
-        if self.tokenizer.hasNext() and self.tokenizer.nextTokenType() == self.tokenizer.getToken('not'):
-            negation_queued = True
-            self.tokenizer.next()
-        if self.tokenizer.hasNext() and self.tokenizer.nextTokenType() == self.tokenizer.getToken('lp'):
-            self.tokenizer.next()
-            expression = self.parseExpression()
-            if negation_queued:
-                expression.negate = True
-                expression.carryover.append(self.tokenizer.getToken('not'))
-                negation_queued = False
-            expression.carryover.append(self.tokenizer.getToken('lp'))
-            expression.carryover.append(self.tokenizer.getToken('rp'))
-            if self.tokenizer.hasNext() and self.tokenizer.nextTokenType() == self.tokenizer.getToken('rp'):
-                self.tokenizer.next()
-                return expression
-            else:
-                raise Exception("Closing ) expected, but got " +
-                                self.tokenizer.peek())
-
-        terminal1 = self.parseTerminal()
-        if negation_queued:
-            terminal1.negate = True
-            negation_queued = False
-        if self.tokenizer.hasNext() and self.tokenizer.nextTokenTypeIsOperator():
-            condition = TreeNode(self.tokenizer.nextTokenType())
-            self.tokenizer.next()
-            if self.tokenizer.nextTokenType() == self.tokenizer.getToken('not'):
-                negation_queued = True
-            terminal2 = self.parseTerminal()
-            if negation_queued:
-                terminal2.negate = True
-                negation_queued = False
-            condition.left = terminal1
-            condition.right = terminal2
-            return condition
-        elif not self.tokenizer.hasNext() or self.tokenizer.nextTokenType() in [self.tokenizer.getToken('rp'), self.tokenizer.getToken('and'), self.tokenizer.getToken('or')]:
-            return terminal1
-        else:
-            raise Exception('Operator expected, but got ' +
-                            self.tokenizer.next())
-
-    def parseTerminal(self):
-        if self.tokenizer.hasNext():
-            tokenType = self.tokenizer.nextTokenType()
-            if tokenType == self.tokenizer.getToken('val'):
-                n = TreeNode(tokenType)
-                n.value = bool(self.tokenizer.next())
-                return n
-            elif tokenType == self.tokenizer.getToken('var'):
-                n = TreeNode(tokenType)
-                n.value = self.tokenizer.next()
-                return n
+
+        for tokenType, token in self.tokenizer.iterTokens():
+            if expect_operand:
+                if tokenType == not_token_type:
+                    negation_queued = not negation_queued
+                elif tokenType == lp_token_type:
+                    operators.append((lp_token_type, negation_queued))
+                    negation_queued = False
+                elif tokenType == var_token_type or tokenType == val_token_type:
+                    node = TreeNode(tokenType)
+                    if tokenType == val_token_type:
+                        node.value = token in ['True', 'true', '1']
+                    else:
+                        node.value = token
+                    node.negate = negation_queued
+                    negation_queued = False
+                    operands.append(node)
+                    expect_operand = False
+                else:
+                    raise Exception('NUM or VAR expected, but got ' + token)
+            elif tokenType == rp_token_type:
+                while operators and not isinstance(operators[-1], tuple):
+                    self.reduce(operands, operators)
+                if not operators:
+                    raise Exception('Unexpected ) in formula')
+                _, negate = operators.pop()
+                if negate:
+                    operands[-1].negate = not operands[-1].negate
+            elif tokenType in self.precedence:
+                while operators and not isinstance(operators[-1], tuple) \
+                        and self.precedence[operators[-1]] >= self.precedence[tokenType]:
+                    self.reduce(operands, operators)
+                operators.append(tokenType)
+                expect_operand = True
             else:
-                raise Exception(
-                    'NUM or VAR expected, but got ' + self.tokenizer.next())
-
-        else:
-            raise Exception('NUM or VAR expected, but got ' +
-                            self.tokenizer.next())
-
-        left = self.evaluateRecursive(treeNode.left, variable_dict)
-        right = self.evaluateRecursive(treeNode.right, variable_dict)
-        if treeNode.tokenType == self.tokenizer.getToken('eq'):
-            result = left == right
-        elif treeNode.tokenType == self.tokenizer.getToken('neq'):
-            result = left != right
-        elif treeNode.tokenType == self.tokenizer.getToken('and'):
-            result = left and right
-        elif treeNode.tokenType == self.tokenizer.getToken('or'):
-            result = left or right
-        else:
-            raise Exception('Unexpected type ' + str(treeNode.tokenType))
-
-        if treeNode.negate == True:
-            return not result
-        return result
+                raise Exception('Operator expected, but got ' + token)
+
+        if expect_operand:
+            raise Exception('NUM or VAR expected, but got formula end')
+
+        while operators:
+            if isinstance(operators[-1], tuple):
+                raise Exception('Closing ) expected, but got formula end')
+            self.reduce(operands, operators)
+
+        self.root = operands[0]
+
+    def reduce(self, operands, operators):
+        node = TreeNode(operators.pop())
+        node.right = operands.pop()
+        node.left = operands.pop()
+        operands.append(node)
 
     def toString(self):
-        return self.toStringRecursive(self.root)
-
-    def toStringRecursive(self, treeNode):
-        current = ''
-        left = ''
-        right = ''
-
-        treeNode = self.carryOver(treeNode)
-
-        if treeNode.left != None:
-            left = self.toStringRecursive(treeNode.left)
-        else:
-            for token in treeNode.carryover:
-                if token == self.tokenizer.getToken('lp'):
-                    left = left + '('
-                elif token == self.tokenizer.getToken('not'):
-                    left = left + '!'
-
-        if treeNode.right != None:
-            right = self.toStringRecursive(treeNode.right)
-        else:
-            for token in treeNode.carryover:
-                if token == self.tokenizer.getToken('rp'):
-                    right = ')' + right
-
-        if treeNode.tokenType == self.tokenizer.getToken('val'):
-            if treeNode.negate:
-                current = not treeNode.value
-            else:
-                current = treeNode.value
-        if treeNode.tokenType == self.tokenizer.getToken('var'):
-            current = treeNode.value
-            if treeNode.negate:
-                current = '!' + current
-        elif treeNode.tokenType == self.tokenizer.getToken('eq'):
-            current = '=='
-        elif treeNode.tokenType == self.tokenizer.getToken('neq'):
-            current = '!='
-        elif treeNode.tokenType == self.tokenizer.getToken('and'):
-            current = ' and '
-        elif treeNode.tokenType == self.tokenizer.getToken('or'):
-            current = ' or '
-
-        return left + current + right
-
-    def carryOver(self, treeNode):
-        for token in treeNode.carryover:
-            if token == self.tokenizer.getToken('rp'):
-                if treeNode.right != None:
-                    treeNode.right.carryover.append(token)
+        return self.toStringIterative(self.root)
+
+    # renders subtree without recursion, parenthesis are added only where the tree requires them
+    def toStringIterative(self, treeNode):
+        symbols = {'EQ': '==', 'NEQ': '!=', 'AND': ' and ', 'OR': ' or '}
+        parts = []
+        # stack of nodes and already rendered strings, items are taken in reversed order
+        stack = [treeNode]
+
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            elif node.left is None:
+                if node.tokenType == self.tokenizer.getToken('val'):
+                    parts.append(str(node.value != node.negate))
+                else:
+                    parts.append(('!' if node.negate else '') + node.value)
             else:
-                if treeNode.left != None:
-                    treeNode.left.carryover.append(token)
-        return treeNode
+                precedence = self.precedence[node.tokenType]
+                if node.negate:
+                    parts.append('!(')
+                    stack.append(')')
+
+                stack.extend(self.getWrappedChild(node.right, precedence, True))
+                stack.append(symbols[node.tokenType])
+                stack.extend(self.getWrappedChild(node.left, precedence, False))
+
+        return ''.join(parts)
+
+    # stack items of child, enclosed in parenthesis if its operator binds weaker than parent operator
+    def getWrappedChild(self, child, precedence, is_right):
+        if child.left is None or child.negate:
+            return [child]
+
+        child_precedence = self.precedence[child.tokenType]
+        if child_precedence < precedence or (is_right and child_precedence == precedence):
+            return [')', child, '(']
+        return [child]
 
     # diagnostic
     def printTree(self, treeNode):
-        print(treeNode.value, ", ", treeNode.tokenType,
-              ": ", treeNode.carryover, ",", treeNode.negate)
-
-        if treeNode.left != None:
-            print("GO LEFT")
-            self.printTree(treeNode.left)
-        if treeNode.right != None:
-            print("GO RIGHT")
-            self.printTree(treeNode.right)
+        stack = [(treeNode, None)]
+
+        while stack:
+            node, direction = stack.pop()
+            if direction is not None:
+                print(direction)
+            print(node.value, ", ", node.tokenType, ": ", node.negate)
+
+            if node.right != None:
+                stack.append((node.right, "GO RIGHT"))
+            if node.left != None:
+                stack.append((node.left, "GO LEFT"))
@@ -0,0 +1,150 @@
+from array import array
+from itertools import compress, count, islice
+from operator import not_, sub
+from utils.clause_store import ClauseStore
+import gzip
+import io
+import os
+
+# number of clauses formatted before a single write, it bounds memory used by writeDIMAC
+WRITE_BATCH_SIZE = 2**14
+
+
+# DIMACS formula loaded in bulk, clauses are kept as signed integer literals
+# without line-ending zeros, see ClauseStore for the layout
+class DimacsFormula(ClauseStore):
+    def __init__(self, formula_type, vars_num, clauses_num, literals, offsets):
+        super().__init__(literals, offsets)
+        self.formula_type = formula_type
+        self.vars_num = vars_num
+        self.clauses_num = clauses_num
+
+    def getVarsNum(self):
+        return max(self.vars_num, super().getVarsNum())
+
+    # infix form compatible with BooleanParser, every variable X is named userdefX
+    def toInfixStr(self):
+        if self.formula_type == 'cnf':
+            inner_operator, outer_operator, parenthesis = " or ", " and ", True
+        else:
+            inner_operator, outer_operator, parenthesis = " and ", " or ", False
+
+        subformulas_list = []
+        for clause in self:
+            subformula = inner_operator.join(
+                [f'not userdef{-lit}' if lit < 0 else f'userdef{lit}' for lit in clause])
+            subformulas_list.append(
+                f'({subformula})' if parenthesis else subformula)
+
+        return outer_operator.join(subformulas_list)
+
+
+def dimacsFromClauses(clauses, formula_type='cnf'):
+    literals = array('i')
+    offsets = array('q', [0])
+    for clause in clauses:
+        literals.extend(clause)
+        offsets.append(len(literals))
+
+    vars_num = max(map(abs, literals)) if len(literals) > 0 else 0
+    return DimacsFormula(formula_type, vars_num, len(offsets) - 1, literals, offsets)
+
+
+def loadDIMAC(filepath):
+    with open(filepath, 'rb') as file:
+        return parseDIMAC(file.read())
+
+
+# data: content of DIMACS file, bytes or str
+def parseDIMAC(data):
+    if isinstance(data, str):
+        data = data.encode()
+
+    # skip comment lines and find the problem line
+    position = 0
+    header = None
+    while position < len(data):
+        line_end = data.find(b'\n', position)
+        if line_end == -1:
+            line_end = len(data)
+        line = data[position:line_end]
+        position = line_end + 1
+
+        if line[:1] == b'c':
+            continue
+        # check if file is truly a dnf or cnf file inside
+        elif line[:1] == b'p' and line[2:5] in [b'cnf', b'dnf']:
+            header = line.split()
+            break
+        else:
+            raise RuntimeError(
+                "Intial file lines do not follow DNF or CNF syntax.")
+
+    if header is None:
+        raise RuntimeError(
+            "Intial file lines do not follow DNF or CNF syntax.")
+
+    try:
+        vars_num, clauses_num = int(header[2]), int(header[3])
+    except (IndexError, ValueError):
+        raise RuntimeError("Syntax error in problem line.")
+
+    # the whole clause section is converted at once, every clause ends with zero
+    try:
+        tokens = array('i', map(int, data[position:].split()))
+    except (ValueError, OverflowError):
+        raise RuntimeError("Syntax error in clause line.")
+
+    if len(tokens) > 0 and tokens[-1] != 0:
+        raise RuntimeError("Syntax error in clause line.")
+
+    # zero positions are turned into clause offsets without visiting tokens in python code,
+    # i-th zero at position p closes a clause which ends at literal p - i
+    literals = array('i', filter(None, tokens))
+    offsets = array('q', [0])
+    offsets.extend(map(sub, compress(count(), map(not_, tokens)), count()))
+
+    return DimacsFormula(header[1].decode(), vars_num, clauses_num, literals, offsets)
+
+
+# streams clauses in DIMACS format, the whole text is never built in memory
+# clauses: ClauseStore or other sized iterable of clauses made of signed variable ids
+# target: path (compressed with gzip if compress is True or path ends with .gz) or file-like object, text or binary
+# vars_num: number of variables in problem line, by default it is taken from ClauseStore
+# comments: lines written before problem line, each one is prefixed with 'c '
+# separator: written after every clause, header=False skips comments and problem line
+def writeDIMAC(clauses, target, vars_num=None, comments=(), formula_type='cnf', compress=None, header=True,
+               separator='\n'):
+    if isinstance(target, (str, os.PathLike)):
+        if compress is None:
+            compress = os.fspath(target).endswith('.gz')
+        with (gzip.open(target, 'wb') if compress else open(target, 'wb')) as file:
+            writeDIMAC(clauses, file, vars_num, comments, formula_type, False, header, separator)
+        return
+
+    if compress:
+        with gzip.GzipFile(fileobj=target, mode='wb') as file:
+            writeDIMAC(clauses, file, vars_num, comments, formula_type, False, header, separator)
+        return
+
+    if isinstance(target, io.TextIOBase):
+        write = target.write
+    else:
+        def write(text):
+            target.write(text.encode())
+
+    if header:
+        if vars_num is None:
+            vars_num = clauses.getVarsNum()
+        for comment in comments:
+            write(f'c {comment}\n' if comment else 'c\n')
+        write(f'p {formula_type} {vars_num} {len(clauses)}\n')
+
+    clause_end = f' 0{separator}'
+    clauses = iter(clauses)
+    while True:
+        batch = [' '.join(map(str, clause)) + clause_end if len(clause) else clause_end[1:]
+                 for clause in islice(clauses, WRITE_BATCH_SIZE)]
+        if not batch:
+            break
+        write(''.join(batch))
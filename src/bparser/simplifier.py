@@ -0,0 +1,242 @@
+from bparser.boolparser import TreeNode
+
+# operator of the node after negation is moved to its operands (De Morgan) or absorbed by the operator
+NEGATED_OPERATORS = {'AND': 'OR', 'OR': 'AND', 'EQ': 'NEQ', 'NEQ': 'EQ'}
+
+
+# rewrites parse tree (see BooleanParser) before encoding, passes are repeated until nothing changes:
+# constant folding: a && true -> a, a || true -> true, a == false -> !a, ...
+# idempotence and complement: a && a -> a, a || !a -> true, a == a -> true, ...,
+# also over whole chains of the same operator: a && b && a -> a && b, a || b || !a -> true
+# absorption: a && (a || b) -> a, a || (a && b) -> a
+# negations: !(a == b) -> a != b, !(!a && !b) -> a || b
+# negation of AND/OR is moved to operands only if it removes more negated terms than it adds,
+# negated operator is encoded as a single NAND/NOR gate, but every negated term needs its own NOT gate
+class TreeSimplifier:
+    def __init__(self):
+        # structure of subtree without its own negation -> id, equal subtrees have equal ids
+        self.body_ids = {}
+        # id(node) -> body id, valid for nodes of the current tree
+        self.node_bodies = {}
+
+        self.stats = {
+            "passes": 0,
+            "nodes_before": 0,
+            "nodes_after": 0,
+            "removed_nodes": 0,
+            "removed_negations": 0,
+            "folded_constants": 0,
+            "idempotent": 0,
+            "complements": 0,
+            "absorptions": 0,
+            "pushed_negations": 0
+        }
+
+    # returns root of simplified tree, nodes of the given tree are reused
+    def simplify(self, root, max_passes=None):
+        nodes_num, negations_num = self.getTreeSize(root)
+        self.stats["nodes_before"] = nodes_num
+
+        changed = True
+        while changed and (max_passes is None or self.stats["passes"] < max_passes):
+            root, changed = self.simplifyPass(root)
+            self.stats["passes"] += 1
+
+        self.stats["nodes_after"], simplified_negations_num = self.getTreeSize(root)
+        self.stats["removed_nodes"] = nodes_num - self.stats["nodes_after"]
+        self.stats["removed_negations"] = negations_num - simplified_negations_num
+        return root
+
+    # single bottom-up walk, returns new root and True if any rule was applied
+    def simplifyPass(self, root):
+        self.node_bodies = {}
+        changed = False
+        # replacement of every visited node
+        results = {}
+        # third element is True for nodes inside chain of the same operator (not its top node)
+        stack = [(root, False, False)]
+
+        while stack:
+            node, visited, in_chain = stack.pop()
+            if node.left is None:
+                if node.tokenType == 'VAL' and node.negate:
+                    node.negate = False
+                    node.value = not node.value
+                    self.stats["folded_constants"] += 1
+                    changed = True
+                self.setBody(node)
+                results[id(node)] = node
+            elif not visited:
+                stack.append((node, True, in_chain))
+                stack.append((node.right, False, self.isChainChild(node, node.right)))
+                stack.append((node.left, False, self.isChainChild(node, node.left)))
+            else:
+                node.left = results[id(node.left)]
+                node.right = results[id(node.right)]
+                result = self.simplifyNode(node)
+                if result is node and not in_chain and node.tokenType in ['AND', 'OR']:
+                    result = self.simplifyChain(node)
+                if result is not node:
+                    changed = True
+                elif self.pushNegation(node):
+                    changed = True
+                self.setBody(result)
+                results[id(node)] = result
+
+        return results[id(root)], changed
+
+    # returns node which replaces the given one, children are already simplified
+    def simplifyNode(self, node):
+        left, right, operator = node.left, node.right, node.tokenType
+
+        # constants
+        if left.tokenType == 'VAL' or right.tokenType == 'VAL':
+            constant, other = (left, right) if left.tokenType == 'VAL' else (right, left)
+            self.stats["folded_constants"] += 1
+            if operator == 'AND':
+                result = other if constant.value else constant
+            elif operator == 'OR':
+                result = constant if constant.value else other
+            elif operator == 'EQ':
+                result = other if constant.value else self.toggleNegation(other)
+            else:
+                result = self.toggleNegation(other) if constant.value else other
+            return self.toggleNegation(result) if node.negate else result
+
+        # the same operands or operand and its negation
+        if self.node_bodies[id(left)] == self.node_bodies[id(right)]:
+            if left.negate == right.negate:
+                self.stats["idempotent"] += 1
+                if operator in ['AND', 'OR']:
+                    result = left
+                else:
+                    result = self.getConstant(operator == 'EQ')
+            else:
+                self.stats["complements"] += 1
+                result = self.getConstant(operator in ['OR', 'NEQ'])
+            return self.toggleNegation(result) if node.negate else result
+
+        # absorption
+        if operator in ['AND', 'OR']:
+            inner_operator = 'OR' if operator == 'AND' else 'AND'
+            for operand, other in [(left, right), (right, left)]:
+                if other.tokenType == inner_operator and not other.negate \
+                        and (self.isSameLiteral(operand, other.left) or self.isSameLiteral(operand, other.right)):
+                    self.stats["absorptions"] += 1
+                    return self.toggleNegation(operand) if node.negate else operand
+
+        return node
+
+    def isChainChild(self, node, child):
+        return node.tokenType in ['AND', 'OR'] and child.tokenType == node.tokenType and not child.negate
+
+    # rules of simplifyNode applied to all operands of the chain with the top node, operands have to be simplified,
+    # chain without duplicates is built again from its nodes
+    def simplifyChain(self, node):
+        operator = node.tokenType
+        operands = {}
+        duplicates_num = 0
+        stack = [node.right, node.left]
+        while stack:
+            child = stack.pop()
+            if self.isChainChild(node, child):
+                stack.append(child.right)
+                stack.append(child.left)
+                continue
+
+            body = self.node_bodies[id(child)]
+            if (body, not child.negate) in operands:
+                self.stats["complements"] += 1
+                result = self.getConstant(operator == 'OR')
+                return self.toggleNegation(result) if node.negate else result
+            if (body, child.negate) in operands:
+                duplicates_num += 1
+            else:
+                operands[(body, child.negate)] = child
+
+        if not duplicates_num:
+            return node
+
+        self.stats["idempotent"] += duplicates_num
+        operands = list(operands.values())
+        result = operands[0]
+        for operand in operands[1:]:
+            parent = TreeNode(operator)
+            parent.left, parent.right = result, operand
+            self.setBody(parent)
+            result = parent
+        if node.negate:
+            self.toggleNegation(result)
+        return result
+
+    # moves negation of the node to its operator or operands, returns True if the node was changed
+    def pushNegation(self, node):
+        if not node.negate:
+            return False
+
+        if node.tokenType in ['AND', 'OR']:
+            negated_terms = 0
+            for child in [node.left, node.right]:
+                if child.tokenType == 'VAR':
+                    negated_terms += 1 if child.negate else -1
+            if negated_terms <= 0:
+                return False
+            self.toggleNegation(node.left)
+            self.toggleNegation(node.right)
+
+        node.tokenType = NEGATED_OPERATORS[node.tokenType]
+        node.negate = False
+        self.stats["pushed_negations"] += 1
+        return True
+
+    def toggleNegation(self, node):
+        if node.tokenType == 'VAL':
+            node.value = not node.value
+        else:
+            node.negate = not node.negate
+        return node
+
+    def getConstant(self, value):
+        node = TreeNode('VAL')
+        node.value = value
+        return node
+
+    def isSameLiteral(self, first, second):
+        return first.negate == second.negate and self.node_bodies[id(first)] == self.node_bodies[id(second)]
+
+    # children have to be already registered, operands of all binary operators are commutative
+    def setBody(self, node):
+        if node.left is None:
+            body = (node.tokenType, node.value)
+        else:
+            operands = sorted([self.node_bodies[id(node.left)] * 2 + node.left.negate,
+                               self.node_bodies[id(node.right)] * 2 + node.right.negate])
+            body = (node.tokenType, *operands)
+        self.node_bodies[id(node)] = self.body_ids.setdefault(body, len(self.body_ids))
+
+    # unique names of terms in the tree, in order of appearance
+    def getTerms(self, root):
+        terms = {}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.tokenType == 'VAR':
+                terms[node.value] = None
+            elif node.left is not None:
+                stack.append(node.right)
+                stack.append(node.left)
+        return list(terms)
+
+    # number of nodes and negated nodes
+    def getTreeSize(self, root):
+        nodes_num = 0
+        negations_num = 0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            nodes_num += 1
+            negations_num += node.negate
+            if node.left is not None:
+                stack.append(node.left)
+                stack.append(node.right)
+        return nodes_num, negations_num
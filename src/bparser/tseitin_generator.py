@@ -1,73 +1,167 @@
 from bparser.boolparser import BooleanParser
+from bparser.simplifier import TreeSimplifier
+from bparser.dimacs import DimacsFormula, loadDIMAC, dimacsFromClauses, writeDIMAC, WRITE_BATCH_SIZE
+from bparser.binary_format import saveEncoding, loadEncoding
 from solver.SATSolver import SATSolver
+from solver.SolverSession import SolverSession
+from solver.SolverPortfolio import SolverPortfolio
+from solver.CNFPreprocessor import CNFPreprocessor
+from solver.CryptoMiniSatSolver import CryptoMiniSatSolver, SOLVER_NAMES as CRYPTOMINISAT_NAMES
 from utils import tseitin_conversions as tc
-from collections import deque, defaultdict
+from utils.clause_store import ClauseStore
+from utils.phase_stats import PhaseStats, measurePhase
+from collections import defaultdict
 from datetime import datetime
+import multiprocessing
 import os
 import csv
 import re
 import io
 
+# supported clause encodings:
+# tseitin: full equivalence for every gate
+# plaisted-greenbaum (or pg): only the implication direction required by polarity of the gate
+ENCODINGS = ['tseitin', 'plaisted-greenbaum', 'pg']
+
 
 class TseitinFormula:
     def __init__(self, formula, formula_format="string", export_to_cnf_file=False, debug=False, use_solver=True,
-                 solver_name='m22', return_all_assignments=False, use_timer=True, interrupt_time=None):
+                 solver_name='m22', return_all_assignments=False, use_timer=True, interrupt_time=None,
+                 encoding='tseitin', flatten=True, max_assignments=None, simplify=True, preprocess=False,
+                 trace_memory=False, phase_hooks=None):
+
+        # wall time, CPU time and peak memory of phases: load, parse, simplify, encode, solve, export,
+        # phase_hooks are called after every phase, e.g. hook(phase, measurement), see PhaseStats
+        self.phase_stats = PhaseStats(trace_memory=trace_memory, hooks=phase_hooks)
 
         self.inputFile = None
         self.root = None
+        self.tree = None
         self.debug = debug
+        self.encoding = encoding
+        # collapse chains of the same associative operator into single n-ary gates
+        self.flatten = flatten
+        # rewrite parse tree before encoding (constants, idempotence, absorption, negations), see TreeSimplifier
+        self.simplify = simplify
+        self.simplify_stats = TreeSimplifier().stats
+        # simplify clauses before solving (unit propagation, subsumption, variable elimination), see CNFPreprocessor
+        self.preprocess = preprocess
+        # statistics of the last preprocessing, empty if clauses were not preprocessed
+        self.preprocess_stats = {}
+
+        # formula given as integer clauses, it is processed without the parser
+        self.dimacs = None
+        self.original_formula = None
 
         # list of all clauses based on tree
         # every clause is a list, where:
-        # id = 0: first term or index of another clause
+        # id = 0: list of operands, every operand is a term or index of another clause
         # id = 1: operator id
-        # id = 2: second term or index of another clause
+        # id = 2: True if result of the operator is negated
+        # after conversion it is replaced with ClauseStore of the Tseitin CNF
         self.clauses = []
 
         self.original_terms = []
+        # terms of the input formula removed by simplification or folding of gates (e.g. b in a && (b || !b)),
+        # their value does not matter, they are kept as variables without clauses, so the solver enumerates
+        # both of their values
+        self.eliminated_terms = []
 
-        # list of all terms in expression
+        # all terms in expression, term name -> variable id (starts from 1)
         self.terms = {}
 
-        # ids of last clause for left and right tree, it is necessary to get the last clause
-        self.last_clause_ids = []
+        # structural hashing of gates, identical subformulas share one Tseitin variable
+        # keys: (operator, is_negated, normalized operands), values: index of clause
+        self.gate_ids = {}
+        # operand of the whole formula: term name or index of clause
+        self.root_operand = None
+        self.sharing_stats = {
+            "shared_gates": 0,
+            "saved_variables": 0,
+            "saved_clauses": 0
+        }
+
+        # gates encoded as xor constraints: (variable ids [a, b, c], rhs, first clause, end clause),
+        # clauses from first to end (exclusive) are CNF form of a xor b xor c = rhs
+        self.xor_gates = []
 
         # formatted dict of all clauses
         # keys: clause name, for example phi0
-        # values: dict with keys 'first_term', 'second_term', 'operator', 'is_negated'
+        # values: dict with keys 'first_term', 'second_term', 'operator' and 'terms' (list of all operands)
         self.clause_map = {}
 
+        # text forms of the CNF built on first use, see getArtefact
+        self.artefacts = {}
+
         self.terms_assignment = {}
         self.execution_time_str = '--'
+        # SAT, UNSAT or UNKNOWN (solver was not run or interrupt_time was exceeded before any answer)
+        self.solver_status = 'UNKNOWN'
+        # True if solving or enumeration of assignments was stopped by interrupt_time
+        self.solver_timeout = False
+        # set only if solvers portfolio was used, see SolverPortfolio.solve
+        self.portfolio_report = None
 
         # solver params
         self.solver_name = solver_name
         self.return_all_assignments = return_all_assignments
+        self.max_assignments = max_assignments
         self.use_timer = use_timer
 
         if formula_format == 'string':
             self.original_formula = formula
         elif formula_format == 'file':
-            self.original_formula = self.getFormulaFromFile(
-                formula, debug=debug)
             self.inputFile = formula
+            formula = self.getFormulaFromFile(
+                formula, debug=debug, as_clauses=True)
+            if isinstance(formula, DimacsFormula):
+                self.dimacs = formula
+            else:
+                self.original_formula = formula
+        elif formula_format == 'clauses':
+            # DimacsFormula object or list of CNF clauses, e.g. [[1, -2], [2, 3]]
+            if isinstance(formula, DimacsFormula):
+                self.dimacs = formula
+            else:
+                self.dimacs = dimacsFromClauses(formula)
+        elif formula_format == 'binary':
+            # encoding saved by saveBinary, it is used without parsing and conversion
+            self.loadBinary(formula)
         else:
             raise RuntimeError(
-                "Unsupported formula format. You can use one of following options: string, file.")
+                "Unsupported formula format. You can use one of following options: string, file, clauses, binary.")
+
+        # terms of the input formula, the ones which are not encoded are eliminated_terms
+        self.input_terms = []
+        if self.dimacs is not None and self.dimacs.formula_type == 'dnf':
+            self.input_terms = [f'userdef{var}' for var in range(1, self.dimacs.getVarsNum() + 1)]
 
         # parse tree
-        if self.debug:
-            print("Parsing formula...")
-        self.tree = BooleanParser(self.original_formula)
-        self.root = self.tree.root
-        if self.debug:
-            print("Parsing complete!\n")
+        if self.dimacs is None and formula_format != 'binary':
+            if self.debug:
+                print("Parsing formula...")
+            with self.phase_stats.measure('parse'):
+                self.tree = BooleanParser(self.original_formula)
+            self.root = self.tree.root
+            if self.debug:
+                print("Parsing complete!\n")
+            self.input_terms = TreeSimplifier().getTerms(self.root)
 
-        self.toCNF()
+            if self.simplify:
+                simplifier = TreeSimplifier()
+                with self.phase_stats.measure('simplify'):
+                    self.root = self.tree.root = simplifier.simplify(self.root)
+                self.simplify_stats = simplifier.stats
+                if self.debug:
+                    print(f'Simplification removed {self.simplify_stats["removed_nodes"]} nodes!\n')
+
+        if formula_format != 'binary':
+            self.toCNF()
 
         if use_solver:
             self.solve(solver_name=self.solver_name, return_all_assignments=self.return_all_assignments,
-                       use_timer=self.use_timer, interrupt_time=interrupt_time)
+                       use_timer=self.use_timer, interrupt_time=interrupt_time, max_assignments=self.max_assignments,
+                       preprocess=self.preprocess)
 
         if export_to_cnf_file:
             if self.debug:
@@ -76,303 +170,591 @@ class TseitinFormula:
             if self.debug:
                 print("Successful data export!\n")
 
-    def toCNF(self):
+    # encoding can be changed per call, gates are built only once and clauses are emitted again
+    @measurePhase('encode')
+    def toCNF(self, encoding=None):
+        if encoding is not None:
+            self.encoding = encoding
+        if self.encoding not in ENCODINGS:
+            raise RuntimeError(
+                f'Unsupported encoding: \'{self.encoding}\'. You can use one of following options: {", ".join(ENCODINGS)}.')
+
         if self.debug:
             print("Converting data to Tseitin formula...")
+        self.artefacts = {}
 
-        self.toTseitinClauses(self.root)
-        self.getTseitinClauses()
-        self.setTseitinFormula()
+        if self.dimacs is not None and self.dimacs.formula_type == 'cnf':
+            self.setFormulaFromClauses(self.dimacs)
+        else:
+            # gates are built only once, root operand is set by the first conversion
+            if self.root_operand is None:
+                if self.dimacs is not None:
+                    self.toDNFGateClauses(self.dimacs)
+                else:
+                    self.toTseitinClauses(self.root)
+                self.removeUnusedGates()
+                self.getTseitinClauses()
+                self.setEliminatedTerms()
+            self.setTseitinFormula()
 
         if self.debug:
             print("Converting complete!\n")
 
+    # post-order walk over the tree, every operator node and negated term becomes a gate
     def toTseitinClauses(self, node):
         var_token = self.tree.tokenizer.getToken('var')
-        nodestack = deque()
-        current = node
-        previous = None
-
-        while True:
-            while current != None and current.tokenType != var_token:
-                if current.right != None and current.right.tokenType != var_token:
-                    nodestack.append((current, current.right))
-                nodestack.append((previous, current))
-
-                previous = current
-                current = current.left
-
-            (previous, current) = nodestack.pop()
-
-            if current.right != None and current.right.tokenType != var_token and len(nodestack) > 0 and nodestack[-1][1] == current.right:
-                nodestack.pop()
-                nodestack.append((previous, current))
-                previous = current
-                current = current.right
-            else:
-                # build clause
-                clause = []
-
-                if current == self.root:
-                    clause = [None, current.tokenType, None, current.negate]
-
-                    if len(self.last_clause_ids) != 2:
-                        if current.left.negate == True or current.left.tokenType == var_token:
-                            # left child is a term
-                            if current.left.negate:
-                                self.clauses.append(
-                                    self.getNegatedTermClause(current.left))
-                                clause[0] = len(self.clauses)-1
-                            else:
-                                clause[0] = current.left.value
-                        else:
-                            # left child is an operator
-                            clause[0] = self.last_clause_ids[0]
-
-                        if current.right.negate == True or current.right.tokenType == var_token:
-                            # right child is a term
-                            if current.right.negate:
-                                self.clauses.append(
-                                    self.getNegatedTermClause(current.right))
-                                clause[2] = len(self.clauses)-1
-                            else:
-                                clause[2] = current.right.value
-                        else:
-                            # right child is an operator
-                            clause[2] = self.last_clause_ids[0]
-                    else:
-                        # both leaves of root node are operators
-                        clause[0] = self.last_clause_ids[0]
-                        clause[2] = self.last_clause_ids[1]
+        not_token = self.tree.tokenizer.getToken('not')
+        val_token = self.tree.tokenizer.getToken('val')
+
+        # after simplification constant can be only the whole formula
+        if node.tokenType == val_token:
+            self.root_operand = node.value != node.negate
+            return
+
+        # operands of already visited nodes: term name or index of clause
+        operands = []
+        # second element is None for nodes which are not visited yet, otherwise it is number of operands
+        nodestack = [(node, None)]
+
+        while nodestack:
+            current, operands_num = nodestack.pop()
+
+            if current.tokenType == var_token:
+                if current.negate:
+                    operands.append(self.getGate(
+                        [current.value], not_token, False))
                 else:
-                    if current.left.value == None:
-                        clause.append(len(self.clauses)-1)
-                    else:
-                        if current.left.negate:
-                            self.clauses.append(
-                                self.getNegatedTermClause(current.left))
-                            clause.append(len(self.clauses)-1)
-                        else:
-                            clause.append(current.left.value)
-
-                    clause.append(current.tokenType)
-
-                    if current.right.value == None:
-                        clause.append(len(self.clauses)-1)
-                    else:
-                        if current.right.negate:
-                            self.clauses.append(
-                                self.getNegatedTermClause(current.right))
-                            clause.append(len(self.clauses)-1)
-                        else:
-                            clause.append(current.right.value)
-
-                    clause.append(current.negate)
-                self.clauses.append(clause)
-
-                if previous == self.root:
-                    self.last_clause_ids.append(len(self.clauses)-1)
-
-                previous = current
-                current = None
-
-            if len(nodestack) <= 0:
-                break
-
-    def getNegatedTermClause(self, node):
-        token = self.tree.tokenizer.getToken('not')
-        return [
-            node.value, token, None, False
-        ]
+                    operands.append(current.value)
+            elif current.tokenType == val_token:
+                raise RuntimeError(
+                    "Constants inside formula are supported only with simplification enabled.")
+            elif operands_num is None:
+                children = self.getGateChildren(current)
+                nodestack.append((current, len(children)))
+                for child in reversed(children):
+                    nodestack.append((child, None))
+            else:
+                gate_operands = operands[-operands_num:]
+                del operands[-operands_num:]
+                operands.append(self.getGate(
+                    gate_operands, current.tokenType, current.negate))
+
+        self.root_operand = operands.pop()
+
+    # operands of the gate, for flattening the whole chain of the same associative operator is collected
+    def getGateChildren(self, node):
+        if not self.flatten or node.tokenType not in ['AND', 'OR']:
+            return [node.left, node.right]
+
+        children = []
+        stack = [node.right, node.left]
+        while stack:
+            child = stack.pop()
+            if child.tokenType == node.tokenType and not child.negate:
+                stack.append(child.right)
+                stack.append(child.left)
+            else:
+                children.append(child)
+        return children
+
+    # returns index of clause defining the gate, the clause is added only if the same gate does not exist yet,
+    # gates which do not need a clause are folded: constant (True or False), term or another gate is returned
+    def getGate(self, operands, operator, is_negated):
+        if operator in ['AND', 'OR']:
+            operands = self.getJunctionOperands(operands, operator)
+            if isinstance(operands, bool):
+                return operands != is_negated
+            if len(operands) == 1:
+                return self.getNegatedOperand(operands[0]) if is_negated else operands[0]
+        elif operator in ['EQ', 'NEQ']:
+            # a == b is not (a xor b), so the gate is a xor b xor (operator is EQ) xor is_negated
+            (first_structure, first_negated), (second_structure, second_negated) = map(
+                self.getOperandLiteral, operands)
+            inverted = (operator == 'EQ') != is_negated
+            if first_structure == second_structure:
+                return (first_negated != second_negated) != inverted
+            if isinstance(operands[0], bool) or isinstance(operands[1], bool):
+                constant, other = operands if isinstance(operands[0], bool) else reversed(operands)
+                return self.getNegatedOperand(other) if constant != inverted else other
+
+        key = self.getGateKey(operands, operator, is_negated)
+        clause_id = self.gate_ids.get(key)
+        if clause_id is not None:
+            self.sharing_stats["shared_gates"] += 1
+            self.sharing_stats["saved_variables"] += 1
+            self.sharing_stats["saved_clauses"] += tc.getTseitinClausesNum(
+                operator, len(operands))
+            return clause_id
+
+        self.clauses.append([operands, operator, is_negated])
+        clause_id = len(self.clauses) - 1
+        self.gate_ids[key] = clause_id
+        return clause_id
+
+    def getGateKey(self, operands, operator, is_negated):
+        normalized_operands = [self.getOperandKey(operand) for operand in operands]
+        if operator in ['AND', 'OR', 'EQ', 'NEQ']:
+            normalized_operands.sort()
+        return (operator, is_negated, *normalized_operands)
+
+    # (structure, is_negated) of operand, the same structure means equal or complementary operands,
+    # term and its NOT gate have the same structure, constants have structure None
+    def getOperandLiteral(self, operand):
+        if isinstance(operand, bool):
+            return None, not operand
+        if isinstance(operand, int):
+            operands, operator, is_negated = self.clauses[operand]
+            if operator == 'NOT':
+                return self.getOperandKey(operands[0]), True
+            return self.getGateKey(operands, operator, False), is_negated
+        return self.getOperandKey(operand), False
+
+    # operands of AND/OR gate without duplicates and neutral constants (true for AND, false for OR),
+    # returns constant if operand and its complement or absorbing constant are joined
+    def getJunctionOperands(self, operands, operator):
+        absorbing = operator == 'OR'
+        literals = {}
+        for operand in operands:
+            if isinstance(operand, bool):
+                if operand == absorbing:
+                    return absorbing
+                continue
+            structure, is_negated = self.getOperandLiteral(operand)
+            if (structure, not is_negated) in literals:
+                return absorbing
+            literals.setdefault((structure, is_negated), operand)
+
+        if not literals:
+            return not absorbing
+        return list(literals.values())
+
+    def getNegatedOperand(self, operand):
+        if isinstance(operand, bool):
+            return not operand
+        if isinstance(operand, int):
+            operands, operator, is_negated = self.clauses[operand]
+            if operator == 'NOT':
+                return operands[0]
+            return self.getGate(operands, operator, not is_negated)
+        return self.getGate([operand], 'NOT', False)
+
+    # folded gates can leave gates which are not operands of any other gate (e.g. !x of x || !x),
+    # they are removed and the others are numbered again, operands are still defined before their gates
+    def removeUnusedGates(self):
+        used = set()
+        is_gate = isinstance(self.root_operand, int) and not isinstance(self.root_operand, bool)
+        stack = [self.root_operand] if is_gate else []
+        while stack:
+            clause_id = stack.pop()
+            if clause_id not in used:
+                used.add(clause_id)
+                stack.extend(operand for operand in self.clauses[clause_id][0] if isinstance(operand, int))
+        if len(used) == len(self.clauses):
+            return
+
+        clause_ids = {}
+        clauses = []
+        for clause_id, clause in enumerate(self.clauses):
+            if clause_id in used:
+                clause_ids[clause_id] = len(clauses)
+                clause[0] = [clause_ids[operand] if isinstance(operand, int) else operand for operand in clause[0]]
+                clauses.append(clause)
+        self.clauses = clauses
+        self.gate_ids = {self.getGateKey(*clause): clause_id for clause_id, clause in enumerate(clauses)}
+        if is_gate:
+            self.root_operand = clause_ids[self.root_operand]
+
+    # terms of the input formula which are not encoded, because they were removed by simplification
+    # or folding of gates (e.g. x || !x), their value does not matter
+    def setEliminatedTerms(self):
+        encoded_terms = set(self.original_terms)
+        encoded_terms.add(self.root_operand)
+        self.eliminated_terms = [term for term in self.input_terms if term not in encoded_terms]
+        self.original_terms.extend(self.eliminated_terms)
+
+    # joins operands with single n-ary gate or, without flattening, with a chain of binary gates
+    def getChainGate(self, operands, operator):
+        if len(operands) == 1:
+            return operands[0]
+        if self.flatten:
+            return self.getGate(operands, operator, False)
+
+        operand = operands[0]
+        for next_operand in operands[1:]:
+            operand = self.getGate([operand, next_operand], operator, False)
+        return operand
+
+    def getOperandKey(self, operand):
+        if operand is None:
+            return (0, 0)
+        elif isinstance(operand, int):
+            return (1, operand)
+        return (2, operand)
+
+    # input is already in CNF, clauses are passed to the solver without Tseitin variables,
+    # variable X is named userdefX
+    def setFormulaFromClauses(self, dimacs):
+        self.clauses = ClauseStore(dimacs.literals, dimacs.offsets, names=[
+            f'userdef{var}' for var in range(1, dimacs.getVarsNum() + 1)])
+        self.terms = self.clauses.terms
+        self.original_terms = list(self.terms)
+
+    # DNF is turned into list of gates in the same format as in toTseitinClauses,
+    # every conjunction becomes an AND gate and all of them are joined by an OR gate
+    def toDNFGateClauses(self, dimacs):
+        clause_operands = []
+        for clause in dimacs:
+            literal_operands = []
+            for literal in clause:
+                term = f'userdef{abs(literal)}'
+                if literal < 0:
+                    term = self.getGate([term], 'NOT', False)
+                literal_operands.append(term)
+
+            if literal_operands:
+                clause_operands.append(
+                    self.getChainGate(literal_operands, 'AND'))
+
+        if not clause_operands:
+            raise RuntimeError("DNF formula does not contain any literal.")
+        self.root_operand = self.getChainGate(clause_operands, 'OR')
 
     def getTseitinClauses(self):
         i = 0
 
         for clause in self.clauses:
             logic_var = "phi" + str(i)
-            first_term, second_term = "", ""
-
-            if isinstance(clause[0], int):
-                first_term = "phi" + str(clause[0])
-            else:
-                first_term = clause[0]
-                self.original_terms.append(first_term)
 
-            if isinstance(clause[2], int):
-                second_term = "phi" + str(clause[2])
-            else:
-                second_term = clause[2]
-                self.original_terms.append(second_term)
+            terms = []
+            for operand in clause[0]:
+                if isinstance(operand, int):
+                    terms.append("phi" + str(operand))
+                else:
+                    terms.append(operand)
+                    self.original_terms.append(operand)
 
-            operator, is_negated = clause[1], clause[3]
+            operator, is_negated = clause[1], clause[2]
             if operator == 'AND' and is_negated:
                 operator = "NAND"
             elif operator == 'OR' and is_negated:
                 operator = 'NOR'
+            elif operator == 'EQ':
+                operator = 'XOR' if is_negated else 'XNOR'
+            elif operator == 'NEQ':
+                operator = 'XNOR' if is_negated else 'XOR'
 
             self.clause_map[logic_var] = {
-                "first_term": first_term,
-                "second_term": second_term,
-                "operator": operator
+                "first_term": terms[0],
+                "second_term": terms[1] if len(terms) > 1 else None,
+                "operator": operator,
+                "terms": terms
             }
 
             i += 1
 
     def setTseitinFormula(self):
-        clauses = []
-        terms = []
+        clauses = ClauseStore()
+        polarities = self.getGatePolarities()
+        self.xor_gates = []
 
         for clause, definition in self.clause_map.items():
             operator = definition['operator']
-
-            if operator == 'NOT':
-                term_list = [definition['first_term'], clause]
-            else:
-                term_list = [definition['first_term'],
-                             definition['second_term'], clause]
-            terms.extend(term_list)
-
-            if operator == 'AND':
-                clauses.extend(tc.getTseitinAndClause(term_list))
+            polarity = polarities[clause]
+
+            term_list = [clauses.getVariable(term)
+                         for term in definition['terms'] + [clause]]
+
+            if len(term_list) > 3:
+                # n-ary gate created by flattening
+                if operator == 'AND':
+                    clauses.extend(tc.getTseitinNaryAndClause(term_list, polarity))
+                elif operator == 'NAND':
+                    clauses.extend(tc.getTseitinNaryNandClause(term_list, polarity))
+                elif operator == 'OR':
+                    clauses.extend(tc.getTseitinNaryOrClause(term_list, polarity))
+                elif operator == 'NOR':
+                    clauses.extend(tc.getTseitinNaryNorClause(term_list, polarity))
+            elif operator == 'AND':
+                clauses.extend(tc.getTseitinAndClause(term_list, polarity))
             elif operator == 'NAND':
-                clauses.extend(tc.getTseitinNandClause(term_list))
+                clauses.extend(tc.getTseitinNandClause(term_list, polarity))
             elif operator == 'OR':
-                clauses.extend(tc.getTseitinOrClause(term_list))
+                clauses.extend(tc.getTseitinOrClause(term_list, polarity))
             elif operator == 'NOR':
-                clauses.extend(tc.getTseitinNorClause(term_list))
+                clauses.extend(tc.getTseitinNorClause(term_list, polarity))
             elif operator == 'NOT':
-                clauses.extend(tc.getTseitinNotClause(term_list))
+                clauses.extend(tc.getTseitinNotClause(term_list, polarity))
+            elif operator in ['XOR', 'XNOR']:
+                first_clause = len(clauses)
+                if operator == 'XOR':
+                    clauses.extend(tc.getTseitinXorClause(term_list, polarity))
+                else:
+                    clauses.extend(tc.getTseitinXnorClause(term_list, polarity))
+                # c <-> a xor b is a xor b xor c = 0, c <-> a xnor b is a xor b xor c = 1
+                self.xor_gates.append((term_list, operator == 'XNOR', first_clause, len(clauses)))
+
+        # append the variable of the whole formula as clause
+        if isinstance(self.root_operand, bool):
+            # formula is a constant, false is an empty clause
+            if not self.root_operand:
+                clauses.addClause([])
+        elif isinstance(self.root_operand, int):
+            clauses.addClause([clauses.getVariable("phi" + str(self.root_operand))])
+        else:
+            # formula is a single term
+            self.original_terms.append(self.root_operand)
+            clauses.addClause([clauses.getVariable(self.root_operand)])
 
-        # append the last variable as clause
-        clauses.append([clause])
+        # free variables, see eliminated_terms
+        for term in self.eliminated_terms:
+            clauses.getVariable(term)
 
-        # removes duplicates from terms list
-        self.terms = dict.fromkeys(terms)
-        idx = 0
-        for t in self.terms:
-            self.terms[t] = idx
-            idx += 1
+        self.terms = clauses.terms
         self.clauses = clauses
 
-    def getTseitinFormulaStr(self, split=True):
-        tseitin_formula = []
-        for clause in self.clauses:
-            term_str = "("
-
-            for term in clause:
-                if term == -1:
-                    term_str += "!"
-                else:
-                    term_str = term_str + term + " or "
-
-            # remove last 'or'
-            term_str = term_str[:-4]
-            term_str = term_str + ")"
+    # polarity of every gate, for full Tseitin encoding all gates have both polarities
+    def getGatePolarities(self):
+        if self.encoding == 'tseitin':
+            return dict.fromkeys(self.clause_map, tc.BOTH)
+
+        polarities = dict.fromkeys(self.clause_map, 0)
+        if isinstance(self.root_operand, int) and not isinstance(self.root_operand, bool):
+            polarities["phi" + str(self.root_operand)] = tc.POSITIVE
+
+        # operands of gate are always defined before the gate, so walking backwards visits parents first
+        for clause in reversed(self.clause_map):
+            definition = self.clause_map[clause]
+            polarity = polarities[clause]
+            if definition['operator'] in ['NAND', 'NOR', 'NOT']:
+                # negation swaps implication direction
+                polarity = ((polarity & tc.POSITIVE) << 1) | ((polarity & tc.NEGATIVE) >> 1)
+            elif definition['operator'] in ['XOR', 'XNOR'] and polarity:
+                # value of xor depends on both values of every operand
+                polarity = tc.BOTH
+
+            for term in definition['terms']:
+                if term in polarities:
+                    polarities[term] |= polarity
+
+        return polarities
+
+    # infix form of the CNF, e.g. (a or !phi0) and (phi0)
+    # split: every clause is placed in new line
+    # writer: file-like object, if it is given the formula is written in batches instead of being returned
+    def getTseitinFormulaStr(self, split=True, writer=None):
+        names = self.clauses.names
+        # literal -> text, negative literals are looked up from the end of the list
+        literal_strs = [None] + names + ['!' + name for name in reversed(names)]
+        separator = " and\n" if split else " and "
+        clauses_num = len(self.clauses)
 
-            tseitin_formula.append(term_str + " and ")
+        if writer is None:
+            return separator.join(self.getClauseStrs(literal_strs, 0, clauses_num))
 
-        tseitin_formula[-1] = tseitin_formula[-1][:-5]
-        if split:
-            for part in tseitin_formula:
-                part = part.replace("and ", "and\n")
+        batch_separator = ""
+        for start in range(0, clauses_num, WRITE_BATCH_SIZE):
+            end = min(start + WRITE_BATCH_SIZE, clauses_num)
+            writer.write(batch_separator + separator.join(self.getClauseStrs(literal_strs, start, end)))
+            batch_separator = separator
 
-        return "".join(tseitin_formula)
+    # texts of clauses from start to end (exclusive), all literals are translated at once
+    def getClauseStrs(self, literal_strs, start, end):
+        offsets = self.clauses.offsets
+        first = offsets[start]
+        texts = list(map(literal_strs.__getitem__, self.clauses.literals[first:offsets[end]]))
+        return ["(" + " or ".join(texts[clause_start - first:clause_end - first]) + ")"
+                for clause_start, clause_end in zip(offsets[start:end], offsets[start + 1:end + 1])]
 
     def toString(self):
         return self.getTseitinFormulaStr(split=False)
 
-    # export Tseitin CNF form to .cnf file
-    def export2CNF(self):
-        clauses_num = len(self.clauses)
-        terms_num = len(self.terms)
-
-        script_path = os.path.dirname(__file__)
-        os_sep = os.sep
-        path_list = script_path.split(os.sep)
-        script_directory = path_list[0:len(path_list)-1]
-
+    # export Tseitin CNF form to .cnf file, clauses are streamed, so memory use does not depend on formula size
+    # target: path or file-like object, by default new file in data directory
+    # compress: gzip output, by default only if target path ends with .gz
+    @measurePhase('export')
+    def export2CNF(self, target=None, compress=None):
         file_name = f'{datetime.now().strftime("%d_%m_%Y_%H_%M_%S")}_data.cnf'
-        rel_path = f'data{os_sep}{file_name}'
-        path = f'{os_sep.join(script_directory)}{os_sep}{rel_path}'
-
-        with open(path, "w+") as file:
-            file.write(f'c {file_name}\n')
-            if self.inputFile:
-                file.write(f'c formula input file: {self.inputFile}\n')
-            file.write("c\n")
-            file.write(f'p cnf {terms_num} {clauses_num}')
-
-            clauses = []
-            for clause in self.clauses:
-                formatted_clause_list = []
-                for idx, term in enumerate(clause):
-                    if term == -1:
-                        continue
-
-                    term_id = self.terms[term] + 1
-                    if idx > 0 and clause[idx-1] == -1:
-                        term_id *= -1
-
-                    formatted_clause_list.append(term_id)
-
-                formatted_clause_list.append(0)
-                clauses.append(" ".join([str(i)
-                                         for i in formatted_clause_list]))
-
-            file.write('\n'.join(map(str, clauses)))
+        if target is None:
+            script_path = os.path.dirname(__file__)
+            os_sep = os.sep
+            path_list = script_path.split(os.sep)
+            script_directory = path_list[0:len(path_list)-1]
+
+            rel_path = f'data{os_sep}{file_name}'
+            target = f'{os_sep.join(script_directory)}{os_sep}{rel_path}'
+        elif isinstance(target, (str, os.PathLike)):
+            file_name = os.path.basename(target)
+
+        comments = [file_name]
+        if self.inputFile:
+            comments.append(f'formula input file: {self.inputFile}')
+        writeDIMAC(self.clauses, target, vars_num=len(self.terms),
+                   comments=comments + [''], compress=compress)
 
     def getCNF(self):
         clauses_num = len(self.clauses)
         terms_num = len(self.terms)
 
-        script_path = os.path.dirname(__file__)
-        os_sep = os.sep
-        path_list = script_path.split(os.sep)
-        script_directory = path_list[0:len(path_list) - 1]
-        clauses = []
-        for clause in self.clauses:
-            formatted_clause_list = []
-            for idx, term in enumerate(clause):
-                if term == -1:
-                    continue
-
-                term_id = self.terms[term] + 1
-                if idx > 0 and clause[idx - 1] == -1:
-                    term_id *= -1
-
-                formatted_clause_list.append(term_id)
-
-            formatted_clause_list.append(0)
-            clauses.append(" ".join([str(i)
-                                     for i in formatted_clause_list]))
-
-       # file.write('\n'.join(map(str, clauses)))
-        print(self.clause_map)
-        tseitin_formula = self.getTseitinFormulaStr(split=False)
+        if self.debug:
+            print(self.clause_map)
         original_terms_num = len(self.original_terms)
         tseitin_terms_num = len(self.terms)
         return ( terms_num,
                  clauses_num,
-                 ' '.join(map(str, clauses)),
-                 tseitin_formula,
+                 self.getArtefact('dimacs'),
+                 self.getArtefact('tseitin_formula'),
                  original_terms_num,
                  tseitin_terms_num
                  #,     self.clause_map
                  )
 
-    def solve(self, solver_name='m22', return_all_assignments=True, use_timer=True, interrupt_time=None):
+    # compact binary file with clauses, variable names and gate definitions, see bparser.binary_format
+    @measurePhase('export')
+    def saveBinary(self, filepath):
+        saveEncoding(self, filepath)
+
+    # by default clauses are memory-mapped, so even big encodings are loaded without copying them
+    @measurePhase('load')
+    def loadBinary(self, filepath, use_mmap=True):
+        if self.debug:
+            print(f'Loading encoding from file: \'{filepath}\'...')
+
+        clauses, metadata = loadEncoding(filepath, use_mmap=use_mmap)
+        self.close()
+        self.artefacts = {}
+        self.clauses = clauses
+        self.terms = clauses.terms
+        self.clause_map = metadata["clause_map"]
+        self.root_operand = metadata["root_operand"]
+        self.eliminated_terms = metadata.get("eliminated_terms", [])
+        self.original_terms = metadata["original_terms"]
+        self.original_formula = metadata["original_formula"]
+        self.encoding = metadata["encoding"]
+        self.sharing_stats = metadata["sharing_stats"]
+        self.xor_gates = [tuple(gate) for gate in metadata.get("xor_gates", [])]
+        self.inputFile = metadata["input_file"]
+        if metadata["is_cnf_input"]:
+            self.dimacs = DimacsFormula('cnf', len(clauses.names), len(clauses), clauses.literals, clauses.offsets)
+
+        if self.debug:
+            print("The encoding has been loaded!\n")
+
+    # unmaps file of encoding loaded by loadBinary, formula can not be used after that
+    def close(self):
+        if isinstance(self.clauses, ClauseStore):
+            self.clauses.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # text forms of the CNF are built only when they are needed and then kept until clauses change
+    # name: 'dimacs' (all clauses in one line, every clause ends with 0) or 'tseitin_formula' (infix form)
+    def getArtefact(self, name):
+        if name not in self.artefacts:
+            if name == 'dimacs':
+                dimacs = io.StringIO()
+                writeDIMAC(self.clauses, dimacs, header=False, separator=' ')
+                self.artefacts[name] = dimacs.getvalue()[:-1]
+            elif name == 'tseitin_formula':
+                self.artefacts[name] = self.getTseitinFormulaStr(split=False)
+            else:
+                raise RuntimeError(f'Unknown artefact: \'{name}\'.')
+        return self.artefacts[name]
+
+    # every returned assignment differs on original terms, Tseitin variables are not enumerated
+    # solver_name 'cms' or 'cryptominisat' uses CryptoMiniSat (pycryptosat package) with native xor constraints
+    # if list of solver names is given, solvers are raced in portfolio and only the first answer is returned
+    # if preprocess is True, pysat solver gets clauses simplified by CNFPreprocessor and its models are mapped back,
+    # CryptoMiniSat always gets original clauses, because xor gates refer to their positions
+    @measurePhase('solve')
+    def solve(self, solver_name='m22', return_all_assignments=True, use_timer=True, interrupt_time=None,
+              max_assignments=None, preprocess=False):
+        if isinstance(solver_name, (list, tuple)):
+            return self.solvePortfolio(solver_name, timeout=interrupt_time)
+
         if self.debug:
             print("Solving in progress...")
 
-        solver_data = SATSolver(
-            self.terms, self.clauses).solve(solver_name, return_all_assignments, use_timer, interrupt_time=interrupt_time)
+        if solver_name in CRYPTOMINISAT_NAMES:
+            # xor gates are passed to CryptoMiniSat as native xor constraints
+            solver_data = CryptoMiniSatSolver(self.terms, self.clauses, self.xor_gates).solve(
+                return_all_assignments, interrupt_time=interrupt_time, project_terms=self.getOriginalTerms(),
+                max_models=max_assignments)
+        else:
+            clauses = self.clauses
+            preprocessor = None
+            if preprocess:
+                # enumerated models differ on original terms, so they can not be eliminated
+                frozen = [self.terms[term] for term in self.getOriginalTerms()] if return_all_assignments else []
+                preprocessor = CNFPreprocessor(self.clauses, frozen)
+                clauses = preprocessor.preprocess()
+                self.preprocess_stats = preprocessor.stats
+                if self.debug:
+                    removed_num = self.preprocess_stats["clauses_before"] - self.preprocess_stats["clauses_after"]
+                    print(f'Preprocessing removed {removed_num} clauses!')
+
+            solver_data = SATSolver(
+                self.terms, clauses).solve(solver_name, return_all_assignments, use_timer, interrupt_time=interrupt_time,
+                                           project_terms=self.getOriginalTerms(), max_models=max_assignments)
+            if preprocessor is not None:
+                solver_data['terms_assignment'] = [preprocessor.getTermsAssignment(terms_assignment)
+                                                   for terms_assignment in solver_data['terms_assignment']]
 
         self.execution_time_str = solver_data['execution_time']
+        self.solver_status = solver_data['status']
+        self.solver_timeout = solver_data['timeout']
         self.terms_assignment = solver_data['terms_assignment']
 
         if self.debug:
             print("Solver is done!\n")
 
+    # runs several solvers in separate processes on the same clauses, the fastest one wins
+    @measurePhase('solve')
+    def solvePortfolio(self, solver_names=None, timeout=None, grace_time=0):
+        if self.debug:
+            print("Solving in portfolio...")
+
+        report = SolverPortfolio(self.terms, self.clauses, solver_names).solve(
+            timeout=timeout, grace_time=grace_time)
+        self.portfolio_report = report
+        if report['winner'] is not None:
+            self.execution_time_str = '{0:.8f}s'.format(report['time'])
+            self.solver_status = 'SAT' if report['satisfiable'] else 'UNSAT'
+        self.solver_timeout = report['winner'] is None and timeout is not None
+        self.terms_assignment = report['terms_assignment']
+
+        if self.debug:
+            if report['winner'] is not None:
+                print(f'Solver \'{report["winner"]}\' won by {report["margin"]:.4f}s!\n')
+            else:
+                print("No solver finished in time!\n")
+        return report
+
+    # incremental solver kept alive across queries, e.g. what-if queries under assumptions,
+    # it should be closed (or used as context manager) when it is no longer needed
+    def getSolverSession(self, solver_name=None):
+        return SolverSession(self.terms, self.clauses,
+                             solver_name=solver_name or self.solver_name, use_timer=self.use_timer)
+
+    # generator of assignments, each distinct assignment of original terms is produced exactly once,
+    # enumeration stops after max_count assignments or time_budget seconds
+    def iterTermsAssignments(self, max_count=None, time_budget=None, only_original=True, solver_name=None):
+        original_terms = self.getOriginalTerms()
+
+        with self.getSolverSession(solver_name) as session:
+            for terms_assignment in session.iterModels(original_terms, max_count, time_budget):
+                if only_original:
+                    terms_assignment = {
+                        term: terms_assignment[term] for term in original_terms}
+                yield terms_assignment
+
+    # unique terms of the input formula (without Tseitin variables)
+    def getOriginalTerms(self):
+        return [term for term in dict.fromkeys(self.original_terms) if term is not None and term in self.terms]
+
     def getTermsAssignment(self, only_original=True):
         if only_original:
             terms_assignment = list()
@@ -388,7 +770,8 @@ class TseitinFormula:
         else:
             return self.terms_assignment
 
-    def getFormulaFromFile(self, filepath, debug=True):
+    @measurePhase('load')
+    def getFormulaFromFile(self, filepath, debug=True, as_clauses=False):
         _, file = os.path.split(filepath)
         extension = file.split(".")[-1]
 
@@ -401,6 +784,8 @@ class TseitinFormula:
 
         if extension == "txt":
             formula = self.getFromulaFromTxt(filepath)
+        elif extension in ["cnf", "dnf"] and as_clauses:
+            formula = loadDIMAC(filepath)
         elif extension in ["cnf", "dnf"]:
             formula = self.getFormulaFromDIMAC(filepath)
 
@@ -410,74 +795,11 @@ class TseitinFormula:
         return formula
 
     def getFormulaFromDIMAC(self, filepath):
-        with open(filepath, 'r') as file:
-            initial_lines = True
-            subformulas_list = []
-            for line in file:
-                subformula = ""
-                if initial_lines:
-                    # skip comment lines
-                    if line[0] == 'c':
-                        continue
-                    # check if file is truly a dnf or cnf file inside and switch flag to formula processing
-                    elif line[0] == 'p' and line[2:5] in ["cnf", "dnf"]:
-                        initial_lines = False
-                    else:
-                        raise RuntimeError(
-                            "Intial file lines do not follow DNF or CNF syntax.")
-                else:
-                    # variable used to concatenate digits of variable numbers higher than 9
-                    variable_number = ""
-                    try_to_place_and = False
-                    expect_number = False
-                    expect_minus_or_number = False
-                    for character in line:
-                        # check if loaded character is of expected type
-                        if expect_minus_or_number and not (character == '-' or character.isdigit()):
-                            raise RuntimeError("Syntax error in clause line.")
-                        else:
-                            expect_minus_or_number = False
-
-                        if expect_number and not character.isdigit():
-                            raise RuntimeError("Syntax error in clause line.")
-                        else:
-                            expect_number = False
-
-                        # if there was an ongoing concatenation of digits but next character is not digit anymore
-                        if variable_number != "" and not character.isdigit():
-                            # it should be whitespace, if so, add a variable called userdefX, where X is concatenated number, to the formula
-                            if character != ' ':
-                                raise RuntimeError(
-                                    "Syntax error in clause line.")
-                            subformula = subformula + " userdef" + variable_number + " "
-                            variable_number = ""
-
-                        # if the whitespace that caused "and placing" was before next variable and not line-ending zero, the placing should happen
-                        if try_to_place_and and character != '0':
-                            subformula += " and "
-                        try_to_place_and = False
-
-                        if character == '-':
-                            subformula += " not "
-                            # minus should be followed by variable number
-                            expect_number = True
-                        elif character == ' ':
-                            try_to_place_and = True
-                            # whitespace should be followed by minus, variable number or line-ending zero
-                            expect_minus_or_number = True
-                        elif character.isdigit():
-                            if character == '0' and variable_number == "":
-                                subformulas_list.append(subformula)
-                                break
-                            variable_number += character
-                        else:
-                            raise RuntimeError("Syntax error in clause line.")
-
-        # while returning, cut off the ending containing " or " caused by the last endline
-        return " or ".join(subformulas_list)
+        return loadDIMAC(filepath).toInfixStr()
 
     # TODO: validate formula
-    def getFromulaFromTxt(self, filepath):
+    @staticmethod
+    def getFromulaFromTxt(filepath):
         with open(filepath, 'r') as file:
             line_list = []
             for line in file:
@@ -485,27 +807,46 @@ class TseitinFormula:
 
         return "".join(line_list)
 
+    def getOriginalFormulaStr(self):
+        if self.original_formula is None:
+            self.original_formula = self.dimacs.toInfixStr()
+        return self.original_formula
+
     def getSolverReport(self):
         report = []
 
         original_terms = list(set(self.original_terms))
         original_terms = [x for x in original_terms if x != None]
-        tseitin_formula = self.getTseitinFormulaStr(split=False)
+        tseitin_formula = self.getArtefact('tseitin_formula')
         original_terms_num = len(original_terms)
         tseitin_terms_num = len(self.terms)
         total_terms_num = original_terms_num + tseitin_terms_num
 
         report = [
-            "Original formula:\n" + self.original_formula,
+            "Original formula:\n" + self.getOriginalFormulaStr(),
             "\n\nTseitin formula:\n" + tseitin_formula,
             "\n\nOriginal number of terms:\n" + str(original_terms_num),
             "\n\nTseitin number of terms:\n" + str(tseitin_terms_num),
             "\n\nTotal number of terms:\n" + str(total_terms_num),
             "\n\nTotal number of clauses:\n" + str(len(self.clauses)),
+            "\n\nShared subformulas:\n" + str(self.sharing_stats["shared_gates"]),
+            "\n\nSaved Tseitin terms:\n" + str(self.sharing_stats["saved_variables"]),
+            "\n\nSaved clauses:\n" + str(self.sharing_stats["saved_clauses"]),
+            "\n\nSimplified nodes:\n" + str(self.simplify_stats["removed_nodes"]),
             "\n\nExecution time:\n" + self.execution_time_str,
+            "\n\nSolver status:\n" + self.solver_status + (" (timeout)" if self.solver_timeout else ""),
             "\n\nTerms assignment:\n"
         ]
 
+        if self.portfolio_report is not None:
+            report.insert(-1, "\n\nWinning solver:\n" + str(self.portfolio_report['winner']))
+        if self.phase_stats.phases:
+            report.insert(-1, "\n\nPhase times:\n" + ", ".join(
+                f'{phase} {stats["wall_time"]:.4f}s' for phase, stats in self.phase_stats.phases.items()))
+        if self.preprocess_stats:
+            report.insert(-1, "\n\nPreprocessed clauses:\n" + str(self.preprocess_stats["clauses_before"]) + " -> " +
+                          str(self.preprocess_stats["clauses_after"]))
+
         for terms_assignment in self.getTermsAssignment():
             report.append(str(terms_assignment) + "\n")
 
@@ -527,7 +868,13 @@ class TseitinFormula:
             ["Tseitin number of terms", tseitin_terms_num],
             ["Total number of terms", total_terms_num],
             ["Total number of clauses", len(self.clauses)],
+            ["Shared subformulas", self.sharing_stats["shared_gates"]],
+            ["Saved Tseitin terms", self.sharing_stats["saved_variables"]],
+            ["Saved clauses", self.sharing_stats["saved_clauses"]],
+            ["Simplified nodes", self.simplify_stats["removed_nodes"]],
             ["Execution time", self.execution_time_str],
+            ["Solver status", self.solver_status],
+            ["Timeout", self.solver_timeout],
             ["Terms assignment"]
         ]
 
@@ -545,3 +892,42 @@ class TseitinFormula:
 
         if self.debug:
             print("Report was saved successfully!\n")
+
+
+# default result of batch item, only picklable data is returned from worker processes
+def getFormulaSummary(formula):
+    return {
+        "terms_num": len(formula.terms),
+        "clauses_num": len(formula.clauses),
+        "solver_status": formula.solver_status,
+        "timeout": formula.solver_timeout,
+        "phase_stats": formula.phase_stats.toDict(),
+        "terms_assignment": formula.getTermsAssignment()
+    }
+
+
+# runs in worker process, errors are returned instead of raised, so one formula does not fail the whole batch
+def processBatchItem(item):
+    formula, options, result_fn = item
+    try:
+        return {"result": result_fn(TseitinFormula(formula, **options))}
+    except Exception as e:
+        return {"error": f'{type(e).__name__}: {e}'}
+
+
+# encodes (and solves) many formulas in parallel, results are returned in order of formulas,
+# every result is a dict with 'result' (value of result_fn) or 'error' key
+# result_fn: function of TseitinFormula, it has to be defined on module level to be sent to worker processes
+# processes: number of worker processes, 1 means processing in the current process
+# options: TseitinFormula arguments, e.g. formula_format, interrupt_time
+def processBatch(formulas, result_fn=getFormulaSummary, processes=None, chunksize=None, **options):
+    items = [(formula, options, result_fn) for formula in formulas]
+    processes = min(processes or os.cpu_count() or 1, len(items))
+    if processes <= 1:
+        return [processBatchItem(item) for item in items]
+
+    # bigger chunks reduce inter-process communication for thousands of small formulas
+    if chunksize is None:
+        chunksize = max(1, len(items) // (processes * 4))
+    with multiprocessing.get_context().Pool(processes) as pool:
+        return pool.map(processBatchItem, items, chunksize)
@@ -1,8 +1,16 @@
 from bparser.boolparser import BooleanParser
-from bparser.tseitin_generator import TseitinFormula
+from bparser.tseitin_generator import TseitinFormula, processBatch
+from bparser.dimacs import parseDIMAC
 from flask import Flask, request
 from flask_restful import Api, Resource, reqparse, abort, fields, marshal_with
 from flask_cors import CORS
+from utils.result_cache import ResultCache, getCacheKey
+from utils.worker_pool import WorkerPool
+from utils.job_manager import JobManager, FINISHED, FAILED, CANCELLED
+from concurrent.futures import TimeoutError, wait, FIRST_COMPLETED
+from functools import partial
+import os
+import time
 
 def simple_tests():
     formulas = {
@@ -30,57 +38,130 @@ def simple_tests():
         #  print(formula.getSolverReport())
         return (formula.getCNF())
 
-#
-# def advanced_test():
-#     print("\n=============== ADVANCED TEST ===============\n")
-#
-#     files_map = {
-#         0: 'src/data/easy-sat-0.cnf',
-#         1: 'src/data/easy-sat-1.cnf',
-#         2: 'src/data/easy-unsat-0.cnf',
-#         3: 'src/data/easy-unsat-1.cnf',
-#         4: 'src/data/medium-sat-0.cnf',
-#         5: 'src/data/medium-sat-1.cnf',
-#         6: 'src/data/medium-sat-2.cnf',
-#         7: 'src/data/medium-sat-3.cnf',
-#         8: 'src/data/medium-unsat-0.cnf',
-#         9: 'src/data/medium-unsat-1.cnf',
-#         10: 'src/data/medium-unsat-2.cnf',
-#         11: 'src/data/medium-unsat-3.cnf',
-#         12: 'src/data/hard-sat-0.cnf',
-#         13: 'src/data/hard-sat-1.cnf',
-#         14: 'src/data/hard-sat-2.cnf',
-#         15: 'src/data/hard-sat-3.cnf',
-#         16: 'src/data/hard-unsat-0.cnf',
-#         17: 'src/data/hard-unsat-1.cnf',
-#         18: 'src/data/hard-unsat-2.cnf',
-#         19: 'src/data/hard-unsat-3.cnf',
-#         20: 'src/data/very-hard-sat.cnf',
-#         21: 'src/data/very-hard-unsat.cnf'
-#     }
-#
-#     input_file_name = files_map[21]
-#     _ = TseitinFormula(formula=input_file_name,
-#                        formula_format='file', export_to_cnf_file=True, debug=True)
+
+# timing of data files and synthetic formulas: python -m benchmarks.benchmark_suite (from src directory)
 
 app = Flask(__name__)
 api = Api(app)
 cors = CORS(app, resources={r"/*": {"origins": "*"}})
 
-def getTseitinResponse(formula_value):
-    formula = TseitinFormula(
-        formula=formula_value, formula_format='string', export_to_cnf_file=False, debug=True, interrupt_time=4,
-        return_all_assignments=True)
-    print(formula.getSolverReport())
-
-    terms, clauses, res, tseitinFormula, originalTermsCount, tseitinTermsCount = formula.getCNF()
-    return {
-        "clauses": clauses,
-        "dimacs": res,
-        "tseitinFormula": tseitinFormula,
-        "originalTermsCount": originalTermsCount,
-        "tseitinTermsCount": tseitinTermsCount
-    }
+# results of repeated formulas are served from cache,
+# TSEITIN_CACHE_PATH enables SQLite file which keeps results between restarts
+cache = ResultCache(max_entries=int(os.environ.get('TSEITIN_CACHE_ENTRIES', 1024)),
+                    max_size=int(os.environ.get('TSEITIN_CACHE_SIZE', 64 * 2**20)),
+                    path=os.environ.get('TSEITIN_CACHE_PATH'))
+
+solver_options = {
+    "solver_name": 'm22',
+    "interrupt_time": 4,
+    "return_all_assignments": True
+}
+
+# encoding and solving run in worker processes, request threads only wait for results,
+# TSEITIN_WORKERS: number of processes (CPU count by default), 0 means solving inside request thread
+# TSEITIN_QUEUE_SIZE: number of waiting requests, next ones get 429 response
+# TSEITIN_REQUEST_TIMEOUT: seconds after which waiting request gets 504 response
+workers_num = int(os.environ.get('TSEITIN_WORKERS', os.cpu_count() or 1))
+queue_size = os.environ.get('TSEITIN_QUEUE_SIZE')
+pool = None
+if workers_num > 0:
+    pool = WorkerPool(max_workers=workers_num, max_queue_size=int(queue_size) if queue_size else None)
+request_timeout = float(os.environ.get('TSEITIN_REQUEST_TIMEOUT', 30))
+
+# fields of response, every one is computed only if it is requested,
+# e.g. building of tseitinFormula (infix form of the whole CNF) is skipped if only counts are needed
+response_fields = {
+    "clauses": lambda formula: len(formula.clauses),
+    "dimacs": lambda formula: formula.getArtefact('dimacs'),
+    "tseitinFormula": lambda formula: formula.getArtefact('tseitin_formula'),
+    "originalTermsCount": lambda formula: len(formula.original_terms),
+    "tseitinTermsCount": lambda formula: len(formula.terms),
+    "solverStatus": lambda formula: formula.solver_status,
+    "termsAssignment": lambda formula: formula.getTermsAssignment(),
+    "phaseStats": lambda formula: formula.phase_stats.toDict()
+}
+
+# solving is skipped if none of these fields is requested
+solver_fields = ["solverStatus", "termsAssignment"]
+
+# TSEITIN_DEBUG=1 prints progress and full solver report of every formula
+debug = os.environ.get('TSEITIN_DEBUG') == '1'
+
+# fields: list of requested response fields, all by default, returns error message if some field is unknown
+# or the list is empty (it would be the same as all fields without solving)
+def getFieldsError(fields):
+    if fields is None:
+        return None
+    if not isinstance(fields, list) or not fields or not all(field in response_fields for field in fields):
+        return f'Fields have to be a non-empty list of: {", ".join(response_fields)}.'
+    return None
+
+
+# None means all fields, so the solver is run
+def isSolverNeeded(fields):
+    return fields is None or any(field in fields for field in solver_fields)
+
+
+# phase statistics describe one computation, so they are not cached,
+# response from cache gets empty phaseStats (if it is requested), because no phase was run for it
+def getCachedResponse(key, fields):
+    response = cache.get(key)
+    if response is not None and (fields is None or "phaseStats" in fields):
+        response["phaseStats"] = {}
+    return response
+
+
+def putCachedResponse(key, response):
+    cache.put(key, {field: value for field, value in response.items() if field != "phaseStats"})
+
+
+def getTseitinResponse(formula_value, fields=None):
+    fields_error = getFieldsError(fields)
+    if fields_error is not None:
+        return {"error": fields_error}, 400
+
+    key = getCacheKey(formula_value, fields=fields, **solver_options)
+    response = getCachedResponse(key, fields)
+    if response is not None:
+        return response
+
+    if pool is None:
+        response, timeout = computeTseitinResponse(formula_value, solver_options, fields=fields)
+    else:
+        future = pool.trySubmit(computeTseitinResponse, formula_value, solver_options, fields=fields)
+        if future is None:
+            return {"error": "Server is busy, try again later."}, 429, {"Retry-After": "1"}
+        try:
+            response, timeout = future.result(timeout=request_timeout)
+        except TimeoutError:
+            # task which has not started yet is dropped and its pool slot is released,
+            # running task can not be stopped, it is finished in the background
+            future.cancel()
+            return {"error": "Request timed out."}, 504
+
+    # interrupted solving may end differently next time
+    if not timeout:
+        putCachedResponse(key, response)
+    return response
+
+
+# runs in worker process, returns response and True if solving was interrupted
+# formula_format: 'string' (infix formula) or 'dimacs' (content of DIMACS file)
+def computeTseitinResponse(formula_value, solver_options, formula_format='string', fields=None):
+    if formula_format == 'dimacs':
+        formula_value, formula_format = parseDIMAC(formula_value), 'clauses'
+
+    formula = TseitinFormula(formula=formula_value, formula_format=formula_format, export_to_cnf_file=False,
+                             debug=debug, use_solver=isSolverNeeded(fields), **solver_options)
+    if debug:
+        print(formula.getSolverReport())
+    return getFormulaResponse(formula, fields)
+
+
+# returns response with requested fields and True if solving was interrupted
+def getFormulaResponse(formula, fields=None):
+    response = {field: response_fields[field](formula) for field in (fields if fields is not None else response_fields)}
+    return response, formula.solver_timeout
 
 
 @app.route('/', methods=['GET', 'POST']) #allow both GET and POST requests
@@ -89,16 +170,194 @@ def tseitin():
         formula_value = '(a || b) && c || !(d && e)'
         return getTseitinResponse(formula_value)
 
-    formula_value = request.get_json()['cnf']
-    return getTseitinResponse(formula_value)
+    body = request.get_json()
+    return getTseitinResponse(body['cnf'], body.get('fields'))
+
+
+# body: {"formulas": [formula, ...], "fields": optional list of response fields}, response: {"results": [...]} in the same order,
+# every result is {"result": response of '/'} or {"error": message}, one bad formula does not fail the batch
+# formulas are split into chunks solved in worker processes, TSEITIN_BATCH_LIMIT: max number of formulas,
+# TSEITIN_BATCH_CHUNK_SIZE: number of formulas in one chunk, if the whole batch is not solved in
+# TSEITIN_REQUEST_TIMEOUT, only formulas of unfinished chunks get error
+batch_limit = int(os.environ.get('TSEITIN_BATCH_LIMIT', 10000))
+batch_chunk_size = int(os.environ.get('TSEITIN_BATCH_CHUNK_SIZE', 16))
+
+@app.route('/batch', methods=['POST'])
+def tseitinBatch():
+    body = request.get_json()
+    formulas, fields = body.get('formulas'), body.get('fields')
+    if not isinstance(formulas, list):
+        return {"error": "List of formulas is missing, use 'formulas' field."}, 400
+    if len(formulas) > batch_limit:
+        return {"error": f'Too many formulas, the limit is {batch_limit}.'}, 413
+    fields_error = getFieldsError(fields)
+    if fields_error is not None:
+        return {"error": fields_error}, 400
+    result_fn = partial(getFormulaResponse, fields=fields)
+    batch_options = dict(solver_options, use_solver=isSolverNeeded(fields))
+
+    results = [None] * len(formulas)
+    keys = [None] * len(formulas)
+    missing = []
+    for idx, formula_value in enumerate(formulas):
+        if not isinstance(formula_value, str):
+            results[idx] = {"error": "Formula has to be a string."}
+            continue
+        try:
+            keys[idx] = getCacheKey(formula_value, fields=fields, **solver_options)
+        except Exception as e:
+            results[idx] = {"error": f'{type(e).__name__}: {e}'}
+            continue
+
+        response = getCachedResponse(keys[idx], fields)
+        if response is not None:
+            results[idx] = {"result": response}
+        else:
+            missing.append(idx)
+
+    if pool is None:
+        solved_chunks = [(missing, processBatch([formulas[idx] for idx in missing], result_fn=result_fn,
+                                                processes=1, **batch_options))]
+    else:
+        solved_chunks = solveBatchChunks(formulas, missing, result_fn, batch_options)
+
+    for chunk, chunk_results in solved_chunks:
+        for idx, item in zip(chunk, chunk_results):
+            if "result" in item:
+                response, timeout = item["result"]
+                if not timeout:
+                    putCachedResponse(keys[idx], response)
+                item = {"result": response}
+            results[idx] = item
+
+    return {"results": results}
+
+
+# chunks are submitted while the pool has free slots and all of them share one deadline,
+# returns list of (indices of formulas, results), chunks which are not solved in time get error for every formula
+def solveBatchChunks(formulas, indices, result_fn, batch_options):
+    deadline = time.perf_counter() + request_timeout
+    pending = [indices[start:start + batch_chunk_size] for start in range(0, len(indices), batch_chunk_size)]
+    pending.reverse()
+    running = {}
+    solved_chunks = []
+    error = None
+
+    while pending or running:
+        while pending:
+            future = pool.trySubmit(processBatch, [formulas[idx] for idx in pending[-1]],
+                                    result_fn=result_fn, processes=1, **batch_options)
+            if future is None:
+                break
+            running[future] = pending.pop()
+
+        # pool is full of other requests
+        if not running:
+            error = "Server is busy, try again later."
+            break
+
+        done, _ = wait(running, timeout=max(deadline - time.perf_counter(), 0), return_when=FIRST_COMPLETED)
+        if not done:
+            error = "Request timed out."
+            break
+
+        for future in done:
+            chunk = running.pop(future)
+            try:
+                solved_chunks.append((chunk, future.result()))
+            except Exception as e:
+                solved_chunks.append((chunk, [{"error": f'{type(e).__name__}: {e}'}] * len(chunk)))
+
+    # chunks which have not started yet release their pool slots
+    for future, chunk in running.items():
+        future.cancel()
+        pending.append(chunk)
+    for chunk in pending:
+        solved_chunks.append((chunk, [{"error": error}] * len(chunk)))
+    return solved_chunks
+
+
+# long-running solves are submitted as jobs, there is no interrupt time unless it is given,
+# TSEITIN_JOB_WORKERS: number of jobs solved at the same time, TSEITIN_JOB_QUEUE_SIZE: number of waiting jobs
+jobs = JobManager(max_workers=int(os.environ.get('TSEITIN_JOB_WORKERS', 1)),
+                  max_queue_size=int(os.environ.get('TSEITIN_JOB_QUEUE_SIZE', 16)))
+
+job_options = ['solver_name', 'interrupt_time', 'return_all_assignments', 'max_assignments']
+
+# jobs find only one assignment unless return_all_assignments is requested, then enumeration stops after
+# TSEITIN_JOB_MAX_ASSIGNMENTS assignments (if max_assignments is not given), finished jobs keep their results
+job_max_assignments = int(os.environ.get('TSEITIN_JOB_MAX_ASSIGNMENTS', 1000))
+
+# body: {"cnf": infix formula} or {"dimacs": content of DIMACS file}, optionally with job_options and "fields"
+@app.route('/jobs', methods=['POST'])
+def submitJob():
+    body = request.get_json()
+    if 'dimacs' in body:
+        formula_value, formula_format = body['dimacs'], 'dimacs'
+    elif 'cnf' in body:
+        formula_value, formula_format = body['cnf'], 'string'
+    else:
+        return {"error": "Formula is missing, use 'cnf' or 'dimacs' field."}, 400
+
+    fields_error = getFieldsError(body.get('fields'))
+    if fields_error is not None:
+        return {"error": fields_error}, 400
+
+    options = dict(solver_options, interrupt_time=None, return_all_assignments=False,
+                   max_assignments=job_max_assignments)
+    options.update({option: body[option] for option in job_options if option in body})
+
+    job_id = jobs.submit(computeTseitinResponse, formula_value, options, formula_format, body.get('fields'))
+    if job_id is None:
+        return {"error": "Jobs queue is full, try again later."}, 429, {"Retry-After": "1"}
+    return jobs.getJob(job_id).getInfo(), 202, {"Location": f'/jobs/{job_id}'}
+
+
+@app.route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+def jobStatus(job_id):
+    job = jobs.getJob(job_id)
+    if job is None:
+        return {"error": "Unknown job."}, 404
+
+    if request.method == 'DELETE' and not jobs.cancel(job_id):
+        return dict(job.getInfo(), error="Job is already done."), 409
+    return job.getInfo()
+
+
+# 200 with response of finished job, 202 with status if it is not done yet
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def jobResult(job_id):
+    job = jobs.getJob(job_id)
+    if job is None:
+        return {"error": "Unknown job."}, 404
+
+    if job.status == FINISHED:
+        return job.result[0]
+    elif job.status == FAILED:
+        return job.getInfo(), 500
+    elif job.status == CANCELLED:
+        return job.getInfo(), 410
+    return job.getInfo(), 202
+
+
+@app.route('/cache', methods=['GET'])
+def cacheStats():
+    return cache.getStats()
+
+
+@app.route('/pool', methods=['GET'])
+def poolStats():
+    return pool.getStats() if pool is not None else {"max_workers": 0}
 
 
 
 
 #api.add_resource(TseitinApi,"/")
 
+# development server, in production run WSGI server instead, e.g.:
+# gunicorn --chdir src --bind 0.0.0.0:5000 --threads 16 main:app
 if __name__ == "__main__":
-    app.run(debug=True)
+    app.run(debug=True, threaded=True)
 
 
 
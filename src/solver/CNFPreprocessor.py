@@ -0,0 +1,285 @@
+from collections import defaultdict
+from utils.clause_store import ClauseStore
+import time
+
+
+# simplifies clauses before solving: unit propagation, subsumption, self-subsuming resolution
+# and bounded variable elimination, variable ids are not changed
+# models of simplified clauses are mapped back to all variables by getTermsAssignment (reconstruction stack)
+class CNFPreprocessor:
+    # clauses: ClauseStore
+    # frozen: variable ids which are not eliminated, e.g. terms used for projection when models are enumerated
+    # max_occurrences: variable is eliminated only if it occurs in at most this number of clauses
+    # max_resolvent_size: variable is not eliminated if any of its resolvents is longer
+    # max_steps: limit of clause checks in one round of subsumption
+    # max_rounds: limit of repetitions of subsumption and elimination
+    def __init__(self, clauses, frozen=(), max_occurrences=16, max_resolvent_size=32, max_steps=2 * 10**6,
+                 max_rounds=4):
+        self.input_clauses = clauses
+        self.frozen = set(frozen)
+        self.max_occurrences = max_occurrences
+        self.max_resolvent_size = max_resolvent_size
+        self.max_steps = max_steps
+        self.max_rounds = max_rounds
+
+        # sets of literals, None for removed clauses
+        self.clauses = []
+        # clause index -> bit mask of its variables, used to quickly reject subset checks
+        self.signatures = []
+        # literal -> indices of clauses which contain it
+        self.occurrences = defaultdict(set)
+        # clauses added or strengthened since the last subsumption
+        self.touched = set()
+        self.units = []
+        # variable id -> value of variables fixed by unit propagation
+        self.values = {}
+        self.eliminated = set()
+        self.unsatisfiable = False
+
+        # (literal, clauses), literal is false unless one of clauses is not satisfied by its other literals,
+        # entries are replayed in reverse order
+        self.reconstruction = []
+
+        self.stats = {
+            "clauses_before": len(clauses),
+            "clauses_after": 0,
+            "vars_before": 0,
+            "vars_after": 0,
+            "fixed_vars": 0,
+            "eliminated_vars": 0,
+            "subsumed_clauses": 0,
+            "strengthened_clauses": 0,
+            "rounds": 0,
+            "unsatisfiable": False,
+            "time": 0
+        }
+
+    # returns new ClauseStore with the same variable names, input clauses are not changed
+    def preprocess(self):
+        start = time.perf_counter()
+
+        for clause in self.input_clauses:
+            self.addClause(clause)
+        self.stats["vars_before"] = self.getOccurringVarsNum()
+        self.propagate()
+
+        while not self.unsatisfiable and self.stats["rounds"] < self.max_rounds:
+            changes = self.getChangesNum()
+            self.subsume()
+            self.eliminate()
+            self.stats["rounds"] += 1
+            if self.getChangesNum() == changes:
+                break
+
+        clauses = self.getClauseStore()
+        self.stats["vars_after"] = self.getOccurringVarsNum()
+        self.stats["unsatisfiable"] = self.unsatisfiable
+        self.stats["time"] = time.perf_counter() - start
+        return clauses
+
+    def getChangesNum(self):
+        return self.stats["fixed_vars"] + self.stats["eliminated_vars"] + self.stats["subsumed_clauses"] + \
+            self.stats["strengthened_clauses"]
+
+    def getOccurringVarsNum(self):
+        return len({abs(literal) for literal, indices in self.occurrences.items() if indices}) + \
+            len([var for var in self.values if var in self.frozen])
+
+    # duplicated literals are merged, tautologies are skipped
+    def addClause(self, literals):
+        clause = set()
+        for literal in literals:
+            if -literal in clause:
+                return
+            clause.add(literal)
+
+        if not clause:
+            self.unsatisfiable = True
+            return
+        if len(clause) == 1:
+            self.units.append(next(iter(clause)))
+
+        idx = len(self.clauses)
+        signature = 0
+        for literal in clause:
+            self.occurrences[literal].add(idx)
+            signature |= 1 << (abs(literal) & 63)
+        self.clauses.append(clause)
+        self.signatures.append(signature)
+        self.touched.add(idx)
+
+    def removeClause(self, idx):
+        for literal in self.clauses[idx]:
+            self.occurrences[literal].discard(idx)
+        self.clauses[idx] = None
+
+    def removeLiteral(self, idx, literal):
+        clause = self.clauses[idx]
+        clause.discard(literal)
+        self.occurrences[literal].discard(idx)
+        self.signatures[idx] = 0
+        for other in clause:
+            self.signatures[idx] |= 1 << (abs(other) & 63)
+        self.touched.add(idx)
+
+        if len(clause) == 1:
+            self.units.append(next(iter(clause)))
+        elif not clause:
+            self.unsatisfiable = True
+
+    def propagate(self):
+        while self.units and not self.unsatisfiable:
+            literal = self.units.pop()
+            var = abs(literal)
+            if var in self.values:
+                if self.values[var] != (literal > 0):
+                    self.unsatisfiable = True
+                continue
+
+            self.values[var] = literal > 0
+            self.stats["fixed_vars"] += 1
+            self.reconstruction.append((literal, [[literal]]))
+            for idx in list(self.occurrences[literal]):
+                self.removeClause(idx)
+            for idx in list(self.occurrences[-literal]):
+                self.removeLiteral(idx, -literal)
+
+    # backward subsumption and self-subsuming resolution of clauses touched since the last call
+    def subsume(self):
+        steps = 0
+        while self.touched and steps < self.max_steps and not self.unsatisfiable:
+            touched = sorted((idx for idx in self.touched if self.clauses[idx] is not None),
+                             key=lambda idx: len(self.clauses[idx]))
+            self.touched = set()
+            for idx in touched:
+                if steps >= self.max_steps or self.unsatisfiable:
+                    break
+                if self.clauses[idx] is not None:
+                    steps += self.subsumeClause(idx)
+            self.propagate()
+
+    # returns number of checked clauses
+    def subsumeClause(self, idx):
+        clauses, signatures, occurrences = self.clauses, self.signatures, self.occurrences
+        clause = clauses[idx]
+        size = len(clause)
+        signature = signatures[idx]
+        steps = 0
+
+        # every clause subsumed by this one contains its least frequent literal
+        literal = min(clause, key=lambda literal: len(occurrences[literal]))
+        for other_idx in list(occurrences[literal]):
+            steps += 1
+            other = clauses[other_idx]
+            if other_idx != idx and len(other) >= size and not signature & ~signatures[other_idx] and clause <= other:
+                self.removeClause(other_idx)
+                self.stats["subsumed_clauses"] += 1
+
+        # (a or b) strengthens (!a or b or c) to (b or c)
+        for literal in list(clause):
+            for other_idx in list(occurrences[-literal]):
+                steps += 1
+                other = clauses[other_idx]
+                if len(other) < size or signature & ~signatures[other_idx]:
+                    continue
+                if all(other_literal == literal or other_literal in other for other_literal in clause):
+                    self.removeLiteral(other_idx, -literal)
+                    self.stats["strengthened_clauses"] += 1
+                    if self.unsatisfiable:
+                        return steps
+
+        return steps
+
+    # variables are eliminated if the number of clauses does not grow, cheapest variables first
+    def eliminate(self):
+        candidates = [var for var in {abs(literal) for literal, indices in self.occurrences.items() if indices}
+                      if var not in self.frozen]
+        candidates.sort(key=lambda var: len(self.occurrences[var]) * len(self.occurrences[-var]))
+
+        for var in candidates:
+            if self.unsatisfiable:
+                break
+            if var not in self.values and var not in self.eliminated:
+                self.eliminateVariable(var)
+
+    # replaces all clauses of the variable with their non-tautological resolvents
+    def eliminateVariable(self, var):
+        positive = [self.clauses[idx] for idx in self.occurrences[var]]
+        negative = [self.clauses[idx] for idx in self.occurrences[-var]]
+        clauses_num = len(positive) + len(negative)
+        if clauses_num == 0 or clauses_num > self.max_occurrences:
+            return False
+
+        resolvents = []
+        for positive_clause in positive:
+            for negative_clause in negative:
+                resolvent = self.getResolvent(positive_clause, negative_clause, var)
+                if resolvent is None:
+                    continue
+                if len(resolvent) > self.max_resolvent_size or len(resolvents) == clauses_num:
+                    return False
+                resolvents.append(resolvent)
+
+        # clauses of one polarity are enough to restore the value of the variable
+        if len(positive) <= len(negative):
+            self.reconstruction.append((var, [list(clause) for clause in positive]))
+        else:
+            self.reconstruction.append((-var, [list(clause) for clause in negative]))
+
+        for idx in list(self.occurrences[var]) + list(self.occurrences[-var]):
+            self.removeClause(idx)
+        for resolvent in resolvents:
+            self.addClause(resolvent)
+        self.eliminated.add(var)
+        self.stats["eliminated_vars"] += 1
+
+        self.propagate()
+        return True
+
+    # returns None for tautology
+    def getResolvent(self, positive_clause, negative_clause, var):
+        resolvent = set(positive_clause)
+        resolvent.discard(var)
+        for literal in negative_clause:
+            if literal != -var:
+                if -literal in resolvent:
+                    return None
+                resolvent.add(literal)
+        return resolvent
+
+    def getClauseStore(self):
+        clauses = ClauseStore(names=self.input_clauses.names)
+        if self.unsatisfiable:
+            clauses.addClause([])
+        else:
+            # values of fixed frozen variables have to be visible to the solver
+            for var, value in self.values.items():
+                if var in self.frozen:
+                    clauses.addClause([var if value else -var])
+            for clause in self.clauses:
+                if clause is not None:
+                    clauses.addClause(sorted(clause, key=abs))
+
+        self.stats["clauses_after"] = len(clauses)
+
+        # tautology keeps all variables in the solver, so its models have values of all of them
+        vars_num = self.input_clauses.getVarsNum()
+        if vars_num:
+            clauses.addClause([vars_num, -vars_num])
+        return clauses
+
+    # terms_assignment: model of preprocessed clauses (term name -> 0 or 1),
+    # returns model of input clauses with values of all variables
+    def getTermsAssignment(self, terms_assignment):
+        terms = self.input_clauses.terms
+        values = {terms[term]: value == 1 for term, value in terms_assignment.items()}
+
+        for literal, clauses in reversed(self.reconstruction):
+            var = abs(literal)
+            values[var] = literal < 0
+            for clause in clauses:
+                if not any(values.get(abs(other), False) == (other > 0) for other in clause if other != literal):
+                    values[var] = literal > 0
+                    break
+
+        return {name: 1 if values.get(var, False) else 0 for var, name in enumerate(self.input_clauses.names, 1)}
@@ -0,0 +1,85 @@
+from solver.SATSolver import SAT, UNSAT, UNKNOWN
+import time
+
+# CryptoMiniSat is optional, it is used only if it is requested as solver
+try:
+    import pycryptosat
+except ImportError:
+    pycryptosat = None
+
+SOLVER_NAMES = ['cms', 'cryptominisat']
+
+
+# CryptoMiniSat with native xor constraints, xor gates are not passed as CNF clauses,
+# so chains of xors are solved by gaussian elimination instead of clause learning
+class CryptoMiniSatSolver:
+    # terms: term name -> variable id
+    # clauses: ClauseStore
+    # xor_gates: list of (variable ids, rhs, first clause, end clause), see TseitinFormula.xor_gates
+    def __init__(self, terms, clauses, xor_gates=()):
+        if pycryptosat is None:
+            raise RuntimeError(
+                "CryptoMiniSat is not installed, you can install it using: pip install pycryptosat")
+
+        self.terms = terms
+        self.names = list(terms)
+        self.clauses = clauses
+        self.xor_gates = xor_gates
+
+    # the same arguments and result as SATSolver.solve,
+    # interrupt_time limits every solve call and enumeration stops when the time is exceeded
+    def solve(self, return_all_assignments=True, interrupt_time=None, project_terms=None, max_models=None):
+        solver_data = {
+            'execution_time': '',
+            'status': UNKNOWN,
+            'timeout': False,
+            'terms_assignment': []
+        }
+
+        if interrupt_time:
+            solver = pycryptosat.Solver(time_limit=interrupt_time)
+        else:
+            solver = pycryptosat.Solver()
+
+        xor_clauses = set()
+        for variables, rhs, first_clause, end_clause in self.xor_gates:
+            solver.add_xor_clause(list(variables), rhs)
+            xor_clauses.update(range(first_clause, end_clause))
+        for idx, clause in enumerate(self.clauses):
+            if idx not in xor_clauses:
+                solver.add_clause(list(clause))
+
+        if project_terms is None:
+            project_vars = list(range(1, len(self.names) + 1))
+        else:
+            project_vars = [self.terms[term] for term in project_terms]
+
+        max_count = max_models if return_all_assignments else 1
+        start = time.perf_counter()
+        result = []
+        while max_count is None or len(result) < max_count:
+            if interrupt_time and time.perf_counter() - start >= interrupt_time:
+                solver_data['timeout'] = True
+                break
+
+            satisfiable, solution = solver.solve()
+            if satisfiable is None:
+                solver_data['timeout'] = True
+                break
+            if not satisfiable:
+                break
+
+            # variables which are not used in any clause are not in the solution, they are free and set to 0
+            values = [var < len(solution) and bool(solution[var]) for var in range(len(self.names) + 1)]
+            result.append({self.names[var - 1]: 1 if values[var] else 0
+                           for var in range(1, len(self.names) + 1)})
+            solver.add_clause([-var if values[var] else var for var in project_vars])
+
+        if result:
+            solver_data['status'] = SAT
+        elif not solver_data['timeout']:
+            solver_data['status'] = UNSAT
+
+        solver_data['execution_time'] = '{0:.8f}s'.format(time.perf_counter() - start)
+        solver_data['terms_assignment'] = result
+        return solver_data
@@ -1,67 +1,55 @@
-from pysat.solvers import Solver
-from threading import Timer
+from solver.SolverSession import SolverSession
+import time
+
+SAT = 'SAT'
+UNSAT = 'UNSAT'
+UNKNOWN = 'UNKNOWN'
 
 
 class SATSolver:
+    # terms: term name -> variable id
+    # clauses: ClauseStore or any iterable of clauses made of signed variable ids
     def __init__(self, terms, clauses):
         self.terms = terms
-        self.clauses = []
-        self.solver_finished = False
-        self.__initSolver(clauses)
-
-    def __initSolver(self, clauses):
-        for clause in clauses:
-            part_clause_list = []
-            for idx, term in enumerate(clause):
-                if term == -1:
-                    continue
-
-                term_id = self.terms[term] + 1
-                if idx > 0 and clause[idx-1] == -1:
-                    term_id *= -1
-
-                part_clause_list.append(term_id)
+        self.clauses = clauses
+
+    # project_terms: only models differing on these terms are returned (e.g. without Tseitin variables)
+    # max_models: limit of returned models if all assignments are requested
+    # interrupt_time: wall-clock budget in seconds for solving and enumeration together,
+    # when it is exceeded returned status is UNKNOWN (no model found yet) and 'timeout' is True
+    def solve(self, solver_name='m22', return_all_assignments=True, use_timer=True, interrupt_time=None,
+              project_terms=None, max_models=None):
+        deadline = None
+        if interrupt_time:
+            if interrupt_time < 1:
+                raise RuntimeError(
+                    "Interrupt time can not be lower than 1s!")
+            deadline = time.perf_counter() + interrupt_time
 
-            self.clauses.append(part_clause_list)
-
-    def solve(self, solver_name='m22', return_all_assignments=True, use_timer=True, interrupt_time=None):
         solver_data = {
             'execution_time': '',
+            'status': UNKNOWN,
+            'timeout': False,
             'terms_assignment': []
         }
 
         result = []
-        with Solver(name=solver_name, bootstrap_with=self.clauses, use_timer=use_timer) as solver:
-            if interrupt_time:
-                if interrupt_time < 1:
-                    raise RuntimeError(
-                        "Interrupt time can not be lower than 1s!")
-
-                timer = Timer(interrupt_time, self.interruptSolver, [
-                              solver, interrupt_time])
-                timer.start()
-                solver.solve_limited()
-
-            for model in solver.enum_models():
-                terms_assignment = {}
-                for (term, value) in zip(self.terms, model):
-                    terms_assignment[term] = 1 if value > 0 else 0
+        with SolverSession(self.terms, self.clauses, solver_name=solver_name, use_timer=use_timer) as session:
+            max_count = max_models if return_all_assignments else 1
+            for terms_assignment in session.iterModels(project_terms, max_count, deadline=deadline):
                 result.append(terms_assignment)
 
-                if not return_all_assignments:
-                    break
+            if session.interrupted:
+                print(f'Solving has been interrupted after {interrupt_time} seconds!')
+                solver_data['timeout'] = True
 
-            self.solver_finished = True
+            if result:
+                solver_data['status'] = SAT
+            elif not session.interrupted:
+                solver_data['status'] = UNSAT
 
-            time_accum = solver.time_accum()
-            solver_data['execution_time'] = '{0:.8f}s'.format(time_accum)
+            solver_data['execution_time'] = session.getExecutionTime()
 
-        solver.delete()
         solver_data['terms_assignment'] = result
 
         return solver_data
-
-    def interruptSolver(self, solver, time):
-        if not self.solver_finished:
-            print(f'Solving has been interrupted after {time} seconds!')
-            solver.interrupt()
@@ -0,0 +1,106 @@
+from pysat.solvers import Solver
+from utils.clause_store import ClauseStore
+import multiprocessing
+import queue
+import time
+
+DEFAULT_PORTFOLIO = ['cadical', 'glucose4', 'maplechrono', 'm22']
+
+
+# runs in separate process, the result is sent back through the queue
+def runPortfolioSolver(solver_name, literals, offsets, results):
+    start = time.perf_counter()
+    try:
+        with Solver(name=solver_name, bootstrap_with=ClauseStore(literals, offsets)) as solver:
+            satisfiable = solver.solve()
+            model = solver.get_model() if satisfiable else None
+        results.put((solver_name, satisfiable, model,
+                     time.perf_counter() - start, None))
+    except Exception as e:
+        results.put((solver_name, None, None,
+                     time.perf_counter() - start, str(e)))
+
+
+# races several pysat backends on the same clause set, the first answer wins and other solvers are terminated
+class SolverPortfolio:
+    # terms: term name -> variable id
+    # clauses: ClauseStore
+    def __init__(self, terms, clauses, solver_names=None):
+        self.terms = terms
+        self.clauses = clauses
+        self.solver_names = solver_names or DEFAULT_PORTFOLIO
+
+    # timeout: wall-clock limit in seconds, None means no limit
+    # grace_time: how long other solvers may still finish after the winner, it allows to measure the margin
+    def solve(self, timeout=None, grace_time=0):
+        context = multiprocessing.get_context()
+        results = context.Queue()
+        processes = {}
+        # memory-mapped clauses are copied once, they can not be sent to other processes as views
+        literals, offsets = self.clauses.toArrays()
+        for solver_name in self.solver_names:
+            process = context.Process(target=runPortfolioSolver, args=(
+                solver_name, literals, offsets, results), daemon=True)
+            process.start()
+            processes[solver_name] = process
+
+        start = time.perf_counter()
+        report = {
+            'winner': None,
+            'satisfiable': None,
+            'time': None,
+            'margin': None,
+            'terms_assignment': [],
+            'solvers': {solver_name: {'status': 'terminated', 'time': None} for solver_name in self.solver_names}
+        }
+
+        try:
+            deadline = None if timeout is None else start + timeout
+            finished_num = 0
+            while finished_num < len(processes):
+                if report['winner'] is not None:
+                    wait_time = report['time'] + grace_time - (time.perf_counter() - start)
+                else:
+                    wait_time = None if deadline is None else deadline - time.perf_counter()
+                if wait_time is not None and wait_time <= 0:
+                    break
+
+                try:
+                    solver_name, satisfiable, model, solve_time, error = results.get(
+                        timeout=wait_time)
+                except queue.Empty:
+                    break
+                finished_num += 1
+
+                if error is not None:
+                    report['solvers'][solver_name] = {
+                        'status': 'error', 'time': solve_time, 'error': error}
+                    continue
+
+                report['solvers'][solver_name] = {
+                    'status': 'SAT' if satisfiable else 'UNSAT', 'time': solve_time}
+                if report['winner'] is None:
+                    report['winner'] = solver_name
+                    report['satisfiable'] = satisfiable
+                    report['time'] = time.perf_counter() - start
+                    if satisfiable:
+                        report['terms_assignment'] = [self.getTermsAssignment(model)]
+                elif report['margin'] is None:
+                    report['margin'] = time.perf_counter() - start - report['time']
+        finally:
+            for process in processes.values():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        # terminated solvers were slower at least by the time they were running after the winner
+        if report['winner'] is not None and report['margin'] is None:
+            report['margin'] = time.perf_counter() - start - report['time']
+            report['margin_is_lower_bound'] = True
+
+        return report
+
+    # variables which are not used in any clause are not in the model, they are free and set to 0
+    def getTermsAssignment(self, model):
+        return {name: 1 if var <= len(model) and model[var - 1] > 0 else 0
+                for var, name in enumerate(self.clauses.names, 1)}
@@ -0,0 +1,130 @@
+from pysat.solvers import Solver
+from solver.Watchdog import getWatchdog
+import time
+
+
+# long-lived incremental solver, clauses are loaded once and learned clauses are kept between queries
+# literals are signed variable ids, the same as in DIMACS format
+class SolverSession:
+    # terms: term name -> variable id
+    # clauses: ClauseStore or any iterable of clauses made of signed variable ids
+    def __init__(self, terms, clauses, solver_name='m22', use_timer=True):
+        self.terms = terms
+        self.names = list(terms)
+        self.solver_name = solver_name
+        self.solver = Solver(
+            name=solver_name, bootstrap_with=clauses, use_timer=use_timer)
+        self.model = None
+        self.queries_num = 0
+        # True if the last query was interrupted by its deadline
+        self.interrupted = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.solver is not None:
+            self.solver.delete()
+            self.solver = None
+
+    # term can be given by name or by variable id
+    def getLiteral(self, term, value=1):
+        var = self.terms[term] if isinstance(term, str) else term
+        return var if value else -var
+
+    def addClause(self, clause):
+        self.solver.add_clause(list(clause))
+
+    def addClauses(self, clauses):
+        for clause in clauses:
+            self.solver.add_clause(list(clause))
+
+    # assumptions: list of literals or dict term -> value (0 or 1), they hold only for this query
+    # deadline: value of time.perf_counter() after which the solver is interrupted
+    # returns True or False, None if the answer is unknown because of the deadline
+    def solve(self, assumptions=None, deadline=None):
+        if isinstance(assumptions, dict):
+            assumptions = [self.getLiteral(term, value)
+                           for term, value in assumptions.items()]
+
+        self.queries_num += 1
+        self.model = None
+        self.interrupted = False
+
+        if deadline is None:
+            result = self.solver.solve(assumptions=assumptions or [])
+        elif time.perf_counter() >= deadline:
+            result = None
+        else:
+            watchdog = getWatchdog()
+            handle = watchdog.schedule(deadline, self.solver.interrupt)
+            try:
+                result = self.solver.solve_limited(
+                    assumptions=assumptions or [], expect_interrupt=True)
+            finally:
+                watchdog.cancel(handle)
+                self.solver.clear_interrupt()
+
+        if result is None:
+            self.interrupted = True
+            return None
+
+        if result:
+            self.model = self.solver.get_model()
+        return result
+
+    def getModel(self):
+        return self.model
+
+    # variables which are not used in any clause (e.g. declared only in DIMACS header) are not in the model,
+    # they are free and set to 0, blocking clause with them adds them to the solver
+    def getModelLiteral(self, var):
+        return self.model[var - 1] if var <= len(self.model) else -var
+
+    # last model as dict term -> value, only named terms are included
+    def getTermsAssignment(self):
+        if self.model is None:
+            return {}
+        return {name: 1 if self.getModelLiteral(var) > 0 else 0 for var, name in enumerate(self.names, 1)}
+
+    # forbids the last model, if terms are given the model is blocked only on them
+    def block(self, terms=None):
+        if self.model is None:
+            raise RuntimeError("There is no model to block.")
+
+        if terms is None:
+            variables = range(1, max(len(self.model), len(self.names)) + 1)
+        else:
+            variables = [self.getLiteral(term) for term in terms]
+        blocking_clause = [-self.getModelLiteral(var) for var in variables]
+
+        self.solver.add_clause(blocking_clause)
+        return blocking_clause
+
+    # lazily enumerates models, every distinct assignment of given terms (all terms by default) is produced once,
+    # blocking clauses stay in the session, enumeration stops after max_count models, time_budget seconds
+    # or at the deadline (solver is interrupted, self.interrupted is set)
+    def iterModels(self, terms=None, max_count=None, time_budget=None, assumptions=None, deadline=None):
+        if time_budget is not None:
+            budget_deadline = time.perf_counter() + time_budget
+            deadline = budget_deadline if deadline is None else min(deadline, budget_deadline)
+        models_num = 0
+
+        while max_count is None or models_num < max_count:
+            if not self.solve(assumptions, deadline):
+                return
+
+            terms_assignment = self.getTermsAssignment()
+            self.block(terms)
+            models_num += 1
+            yield terms_assignment
+
+    # subset of assumptions responsible for the last unsatisfiable answer
+    def getCore(self):
+        return self.solver.get_core()
+
+    def getExecutionTime(self):
+        return '{0:.8f}s'.format(self.solver.time_accum())
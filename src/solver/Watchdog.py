@@ -0,0 +1,77 @@
+from threading import Condition, Thread
+import heapq
+import itertools
+import os
+import time
+
+
+# single background thread firing callbacks at their deadlines, shared by all solver calls,
+# so there is no new thread per request and nothing is left behind after cancel()
+class Watchdog:
+    def __init__(self):
+        self.reset()
+
+    # forked child process has only the forking thread, so the watchdog thread and state of lock
+    # are not valid there, state is created again and the thread is started by the next schedule()
+    def reset(self):
+        self.condition = Condition()
+        # heap of (deadline, id, callback)
+        self.entries = []
+        self.ids = itertools.count()
+        # handle of callback being executed at the moment
+        self.running = None
+        self.thread = None
+
+    # deadline: value of time.perf_counter(), returns handle used by cancel()
+    def schedule(self, deadline, callback):
+        with self.condition:
+            handle = next(self.ids)
+            heapq.heappush(self.entries, (deadline, handle, callback))
+            if self.thread is None:
+                self.thread = Thread(target=self.run, name='solver-watchdog', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+            return handle
+
+    # after return the callback is not running and it will not be called
+    def cancel(self, handle):
+        with self.condition:
+            while self.running == handle:
+                self.condition.wait()
+            entries = [entry for entry in self.entries if entry[1] != handle]
+            if len(entries) != len(self.entries):
+                heapq.heapify(entries)
+                self.entries = entries
+                self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.entries:
+                    self.condition.wait()
+
+                deadline, handle, callback = self.entries[0]
+                wait_time = deadline - time.perf_counter()
+                if wait_time > 0:
+                    self.condition.wait(wait_time)
+                    continue
+
+                heapq.heappop(self.entries)
+                self.running = handle
+
+            try:
+                callback()
+            except Exception as e:
+                print(f'Watchdog callback failed: {e}')
+
+            with self.condition:
+                self.running = None
+                self.condition.notify_all()
+
+
+watchdog = Watchdog()
+os.register_at_fork(after_in_child=watchdog.reset)
+
+
+def getWatchdog():
+    return watchdog
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modules are imported the same way as in src directory, e.g. from bparser.tseitin_generator import TseitinFormula
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,132 @@
+from bparser.boolparser import BooleanParser
+from bparser.simplifier import TreeSimplifier
+from bparser.tseitin_generator import TseitinFormula
+import itertools
+import random
+import pytest
+
+OPERATORS = [' && ', ' || ', ' == ', ' != ']
+
+FORMULAS = [
+    '(a || b) && c || !(d && e)',
+    '((a && b) || (c && d)) && e',
+    '(a && b) || (a && !c)',
+    '!(p && (q || !r))',
+    '!a and a',
+    'a == b',
+    'a != b',
+    '!(a == b)',
+    'a == !b',
+    '!(a != b) || (c == !d)',
+    '(a != b) && (b != c) && (a != !c)',
+    '!(!(a && b) || !(c || !d))',
+    'a && b && a',
+    '(a && b) || (c && d) || (a && b)',
+    'x || y || x || !x',
+    '!(x && y && !x) == (z || !z)',
+]
+
+
+# every binary operator and negation of operands and gates, the same formulas for the same seed
+def getRandomFormula(rng, vars_num, depth):
+    if depth == 0 or rng.random() < 0.2:
+        return ('!' if rng.random() < 0.3 else '') + f'v{rng.randrange(vars_num)}'
+    formula = '(' + getRandomFormula(rng, vars_num, depth - 1) + rng.choice(OPERATORS) + \
+        getRandomFormula(rng, vars_num, depth - 1) + ')'
+    return ('!' if rng.random() < 0.3 else '') + formula
+
+
+def getFormulas():
+    rng = random.Random(2021)
+    return FORMULAS + [getRandomFormula(rng, 5, 4) for _ in range(150)]
+
+
+def evaluate(node, assignment):
+    if node.left is None:
+        value = assignment[node.value] if node.tokenType == 'VAR' else node.value
+    else:
+        left, right = evaluate(node.left, assignment), evaluate(node.right, assignment)
+        value = {'AND': left and right, 'OR': left or right, 'EQ': left == right, 'NEQ': left != right}[node.tokenType]
+    return value != node.negate
+
+
+# all models projected onto original terms
+def getModels(formula, **options):
+    options.setdefault('simplify', False)
+    formula = TseitinFormula(formula, return_all_assignments=True, **options)
+    models = {tuple(sorted(terms_assignment.items())) for terms_assignment in formula.getTermsAssignment()}
+    return formula.solver_status, models
+
+
+def getExpectedModels(formula):
+    root = BooleanParser(formula).root
+    terms = sorted({term for term in TseitinFormula(formula, use_solver=False, simplify=False).getOriginalTerms()})
+    models = set()
+    for values in itertools.product([0, 1], repeat=len(terms)):
+        assignment = dict(zip(terms, values))
+        if evaluate(root, assignment):
+            models.add(tuple(sorted(assignment.items())))
+    return models
+
+
+@pytest.mark.parametrize('formula', getFormulas())
+@pytest.mark.parametrize('flatten', [True, False])
+def test_pg_encoding_is_equisatisfiable_with_tseitin(formula, flatten):
+    tseitin_status, tseitin_models = getModels(formula, encoding='tseitin', flatten=flatten)
+    pg_status, pg_models = getModels(formula, encoding='pg', flatten=flatten)
+
+    assert pg_status == tseitin_status
+    assert pg_models == tseitin_models
+
+
+@pytest.mark.parametrize('formula', getFormulas())
+def test_tseitin_models_match_truth_table(formula):
+    _, models = getModels(formula)
+    assert models == getExpectedModels(formula)
+
+
+# gates are built once, the second conversion only emits clauses again
+@pytest.mark.parametrize('formula', FORMULAS)
+def test_encoding_can_be_changed_after_conversion(formula):
+    tseitin_formula = TseitinFormula(formula, use_solver=False, simplify=False)
+    pg_clauses = list(map(list, TseitinFormula(formula, use_solver=False, simplify=False, encoding='pg').clauses))
+
+    tseitin_formula.toCNF(encoding='pg')
+    assert list(map(list, tseitin_formula.clauses)) == pg_clauses
+
+
+# terms removed by simplification are free variables, so all models of the input formula are enumerated
+@pytest.mark.parametrize('formula', FORMULAS + ['d || !d', 'a && (b || !b)', '(a || (a && b)) && (c == c)'])
+def test_simplified_models_match_truth_table(formula):
+    _, models = getModels(formula, simplify=True)
+    assert models == getExpectedModels(formula)
+
+
+# duplicate operands of flattened chains are removed, operand joined with its complement folds the gate
+@pytest.mark.parametrize('formula, deduplicated_formula', [
+    ('a && b && a', 'a && b'),
+    ('(a && b) || (c && d) || (a && b)', '(a && b) || (c && d)'),
+    ('x || y || x || !x', 'x || !x'),
+    ('(x || !x) && y', 'y'),
+])
+@pytest.mark.parametrize('encoding', ['tseitin', 'pg'])
+def test_flattened_operands_are_deduplicated(formula, deduplicated_formula, encoding):
+    def getClauses(formula):
+        return [sorted(map(abs, clause)) for clause in
+                TseitinFormula(formula, use_solver=False, simplify=False, encoding=encoding).clauses]
+
+    assert len(getClauses(formula)) == len(getClauses(deduplicated_formula))
+    assert all(len(set(clause)) == len(clause) for clause in getClauses(formula))
+
+
+# idempotence and complements are found between any operands of the chain, not only between siblings
+@pytest.mark.parametrize('formula, nodes_num', [
+    ('x || y || x || !x', 1),
+    ('a && b && a', 3),
+    ('(a && b) || (c && d) || (a && b)', 7),
+    ('!(p || q || p) && r', 5),
+])
+def test_simplifier_rules_apply_over_chains(formula, nodes_num):
+    simplifier = TreeSimplifier()
+    simplifier.simplify(BooleanParser(formula).root)
+    assert simplifier.stats["nodes_after"] == nodes_num
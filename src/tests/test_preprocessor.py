@@ -0,0 +1,111 @@
+from bparser.tseitin_generator import TseitinFormula
+from solver.CNFPreprocessor import CNFPreprocessor
+from solver.SolverSession import SolverSession
+from utils.clause_store import ClauseStore
+from test_encoding import getFormulas, getExpectedModels
+import itertools
+import random
+import pytest
+
+VARS_NUM = 6
+
+UNSATISFIABLE_CNFS = [
+    [[1], [-1]],
+    [[1, 2], [-1, 2], [1, -2], [-1, -2]],
+    # pigeonhole: 3 pigeons, 2 holes, variable 2 * pigeon + hole + 1
+    [[1, 2], [3, 4], [5, 6], [-1, -3], [-1, -5], [-3, -5], [-2, -4], [-2, -6], [-4, -6]],
+]
+
+
+# short clauses make units and subsumed clauses, few variables with many occurrences make resolvents,
+# the same CNFs for the same seed
+def getRandomCNF(rng):
+    clauses = []
+    for _ in range(rng.randint(3, 18)):
+        variables = rng.sample(range(1, VARS_NUM + 1), rng.choice([1, 2, 2, 3, 3, 3]))
+        clauses.append([var if rng.random() < 0.5 else -var for var in variables])
+    return clauses
+
+
+def getCNFs():
+    rng = random.Random(2021)
+    return UNSATISFIABLE_CNFS + [getRandomCNF(rng) for _ in range(200)]
+
+
+def getClauseStore(cnf):
+    clauses = ClauseStore(names=[f'v{var}' for var in range(1, VARS_NUM + 1)])
+    for clause in cnf:
+        clauses.addClause(clause)
+    return clauses
+
+
+def isSatisfied(cnf, terms_assignment):
+    return all(any(terms_assignment[f'v{abs(literal)}'] == (literal > 0) for literal in clause) for clause in cnf)
+
+
+def getExpectedAssignments(cnf, terms):
+    assignments = set()
+    for values in itertools.product([0, 1], repeat=VARS_NUM):
+        terms_assignment = {f'v{var}': value for var, value in enumerate(values, 1)}
+        if isSatisfied(cnf, terms_assignment):
+            assignments.add(tuple(terms_assignment[term] for term in terms))
+    return assignments
+
+
+# all models of preprocessed clauses projected onto terms, mapped back to models of input clauses
+def getPreprocessedAssignments(cnf, frozen_terms):
+    clauses = getClauseStore(cnf)
+    preprocessor = CNFPreprocessor(clauses, [clauses.terms[term] for term in frozen_terms])
+    preprocessed_clauses = preprocessor.preprocess()
+
+    with SolverSession(preprocessed_clauses.terms, preprocessed_clauses) as session:
+        models = list(session.iterModels(frozen_terms))
+    return preprocessor, [preprocessor.getTermsAssignment(terms_assignment) for terms_assignment in models]
+
+
+@pytest.mark.parametrize('cnf', getCNFs())
+def test_reconstructed_models_satisfy_input(cnf):
+    preprocessor, assignments = getPreprocessedAssignments(cnf, [])
+
+    assert bool(assignments) == bool(getExpectedAssignments(cnf, []))
+    for terms_assignment in assignments:
+        assert isSatisfied(cnf, terms_assignment)
+
+
+# frozen variables are never eliminated, so models projected onto them are the same as of input clauses
+@pytest.mark.parametrize('cnf', getCNFs())
+def test_models_of_frozen_terms_match_truth_table(cnf):
+    frozen_terms = ['v1', 'v2', 'v3']
+    preprocessor, assignments = getPreprocessedAssignments(cnf, frozen_terms)
+
+    projected_assignments = {tuple(terms_assignment[term] for term in frozen_terms)
+                             for terms_assignment in assignments}
+    assert len(projected_assignments) == len(assignments)
+    assert projected_assignments == getExpectedAssignments(cnf, frozen_terms)
+    for terms_assignment in assignments:
+        assert isSatisfied(cnf, terms_assignment)
+
+
+@pytest.mark.parametrize('cnf', UNSATISFIABLE_CNFS)
+def test_unsatisfiable_input(cnf):
+    preprocessor, assignments = getPreprocessedAssignments(cnf, [])
+    assert assignments == []
+
+
+# every rule has to be exercised by the CNFs above, otherwise the tests do not check it
+def test_all_rules_are_applied():
+    stats = {}
+    for cnf in getCNFs():
+        preprocessor = CNFPreprocessor(getClauseStore(cnf))
+        preprocessor.preprocess()
+        for name in ['fixed_vars', 'eliminated_vars', 'subsumed_clauses', 'strengthened_clauses', 'unsatisfiable']:
+            stats[name] = stats.get(name, 0) + preprocessor.stats[name]
+    assert all(stats.values())
+
+
+# Tseitin variables are eliminated, terms of the formula are frozen when all assignments are enumerated
+@pytest.mark.parametrize('formula', getFormulas())
+def test_preprocessed_formula_models_match_truth_table(formula):
+    tseitin_formula = TseitinFormula(formula, return_all_assignments=True, simplify=False, preprocess=True)
+    models = {tuple(sorted(terms_assignment.items())) for terms_assignment in tseitin_formula.getTermsAssignment()}
+    assert models == getExpectedModels(formula)
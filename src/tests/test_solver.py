@@ -0,0 +1,44 @@
+from bparser.dimacs import parseDIMAC
+from bparser.tseitin_generator import TseitinFormula
+from solver.SolverSession import SolverSession
+import itertools
+import pytest
+
+# variables 3-5 are declared in the header, but they are not used in any clause
+UNUSED_VARIABLES_DIMACS = 'p cnf 5 2\n1 2 0\n-1 0\n'
+
+
+def getExpectedAssignments(dimacs):
+    dimacs_formula = parseDIMAC(dimacs)
+    clauses = list(dimacs_formula)
+    names = [f'userdef{var}' for var in range(1, dimacs_formula.vars_num + 1)]
+    assignments = set()
+    for values in itertools.product([0, 1], repeat=len(names)):
+        if all(any(values[abs(literal) - 1] == (literal > 0) for literal in clause) for clause in clauses):
+            assignments.add(tuple(zip(names, values)))
+    return assignments
+
+
+@pytest.mark.parametrize('return_all_assignments', [False, True])
+def test_unused_variables_are_assigned(tmp_path, return_all_assignments):
+    filepath = tmp_path / 'formula.cnf'
+    filepath.write_text(UNUSED_VARIABLES_DIMACS)
+    formula = TseitinFormula(str(filepath), formula_format='file', return_all_assignments=return_all_assignments)
+
+    assignments = {tuple(terms_assignment.items()) for terms_assignment in formula.getTermsAssignment()}
+    assert formula.solver_status == 'SAT'
+    assert assignments <= getExpectedAssignments(UNUSED_VARIABLES_DIMACS)
+    assert len(assignments) == (8 if return_all_assignments else 1)
+
+
+def test_session_enumerates_unused_variables():
+    formula = TseitinFormula(parseDIMAC(UNUSED_VARIABLES_DIMACS), formula_format='clauses', use_solver=False)
+    with SolverSession(formula.terms, formula.clauses) as session:
+        assignments = {tuple(terms_assignment.items()) for terms_assignment in session.iterModels()}
+    assert assignments == getExpectedAssignments(UNUSED_VARIABLES_DIMACS)
+
+
+def test_portfolio_assigns_unused_variables():
+    formula = TseitinFormula(parseDIMAC(UNUSED_VARIABLES_DIMACS), formula_format='clauses', use_solver=False)
+    report = formula.solvePortfolio(['m22'], timeout=10)
+    assert {tuple(report['terms_assignment'][0].items())} <= getExpectedAssignments(UNUSED_VARIABLES_DIMACS)
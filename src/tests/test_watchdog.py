@@ -0,0 +1,30 @@
+from solver.Watchdog import getWatchdog
+from threading import Event
+import multiprocessing
+import time
+import pytest
+
+
+def fireAfter(delay):
+    fired = Event()
+    getWatchdog().schedule(time.perf_counter() + delay, fired.set)
+    return fired.wait(5)
+
+
+def runForkedWatchdog():
+    raise SystemExit(0 if fireAfter(0.05) else 1)
+
+
+def test_watchdog_fires_callback():
+    assert fireAfter(0.01)
+
+
+# watchdog thread of the parent does not exist in forked child, the child has to start its own
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='fork is not available')
+def test_watchdog_fires_callback_in_forked_process():
+    assert fireAfter(0.01)
+
+    process = multiprocessing.get_context('fork').Process(target=runForkedWatchdog)
+    process.start()
+    process.join(10)
+    assert process.exitcode == 0
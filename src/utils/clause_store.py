@@ -0,0 +1,81 @@
+from array import array
+
+
+# flat storage of CNF clauses made of signed integer literals (DIMACS convention)
+# literals: all literals of all clauses
+# offsets: clause i is stored in literals[offsets[i]:offsets[i+1]]
+# terms: term name -> variable id, ids start from 1
+# names: variable id - 1 -> term name
+# buffer: memory-mapped file if literals and offsets are its read-only views, it is released by close
+class ClauseStore:
+    def __init__(self, literals=None, offsets=None, names=None, buffer=None):
+        self.literals = literals if literals is not None else array('i')
+        self.offsets = offsets if offsets is not None else array('q', [0])
+        self.terms = {}
+        self.names = []
+        self.buffer = buffer
+
+        if names is not None:
+            for name in names:
+                self.getVariable(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # memoryviews can not be pickled (e.g. when clauses are sent to other process), they are copied into arrays
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['literals'], state['offsets'] = self.toArrays()
+        state['buffer'] = None
+        return state
+
+    # literals and offsets as arrays, they are copied only if they are views
+    def toArrays(self):
+        literals = self.literals if isinstance(self.literals, array) else array('i', self.literals)
+        offsets = self.offsets if isinstance(self.offsets, array) else array('q', self.offsets)
+        return literals, offsets
+
+    # unmaps file of clauses loaded with loadEncoding, clauses can not be used after that
+    def close(self):
+        if self.buffer is not None:
+            self.literals.release()
+            self.offsets.release()
+            self.buffer.close()
+            self.buffer = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        literals, offsets = self.literals, self.offsets
+        for idx in range(len(offsets) - 1):
+            yield literals[offsets[idx]:offsets[idx+1]]
+
+    def getClause(self, idx):
+        return self.literals[self.offsets[idx]:self.offsets[idx+1]]
+
+    # interns term name, every name gets its id only once
+    def getVariable(self, name):
+        var = self.terms.get(name)
+        if var is None:
+            self.names.append(name)
+            var = len(self.names)
+            self.terms[name] = var
+        return var
+
+    def getVarsNum(self):
+        if len(self.literals) == 0:
+            return len(self.names)
+        return max(len(self.names), max(self.literals), -min(self.literals))
+
+    def addClause(self, clause):
+        self.literals.extend(clause)
+        self.offsets.append(len(self.literals))
+
+    def extend(self, clauses):
+        for clause in clauses:
+            self.literals.extend(clause)
+            self.offsets.append(len(self.literals))
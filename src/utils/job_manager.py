@@ -0,0 +1,140 @@
+from multiprocessing.connection import wait
+from threading import Lock, Thread
+import multiprocessing
+import queue
+import time
+import uuid
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+# runs in separate process, result or error message is sent back through the pipe
+def runJob(connection, fn, args):
+    try:
+        connection.send((FINISHED, fn(*args)))
+    except Exception as e:
+        connection.send((FAILED, f'{type(e).__name__}: {e}'))
+    finally:
+        connection.close()
+
+
+class Job:
+    def __init__(self, fn, args):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.args = args
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.process = None
+        self.submit_time = time.time()
+        self.start_time = None
+        self.end_time = None
+
+    def isDone(self):
+        return self.status in [FINISHED, FAILED, CANCELLED]
+
+    def getInfo(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "submitTime": self.submit_time,
+            "startTime": self.start_time,
+            "endTime": self.end_time
+        }
+
+
+# long-running jobs executed in background, every running job has its own process, so it can be cancelled
+# at most max_workers jobs are running and max_queue_size are waiting, next submissions are rejected,
+# only max_done_jobs finished jobs are remembered (the oldest ones are forgotten)
+class JobManager:
+    def __init__(self, max_workers=1, max_queue_size=16, max_done_jobs=1024):
+        self.max_workers = max_workers
+        self.max_done_jobs = max_done_jobs
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.lock = Lock()
+        # job id -> Job, in order of submission
+        self.jobs = {}
+        # workers are started on first submission
+        self.workers = []
+
+    # returns job id or None if the queue is full
+    def submit(self, fn, *args):
+        job = Job(fn, args)
+        with self.lock:
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                return None
+            self.jobs[job.id] = job
+            self.forgetDoneJobs()
+
+            if not self.workers:
+                for _ in range(self.max_workers):
+                    worker = Thread(target=self.work, daemon=True)
+                    worker.start()
+                    self.workers.append(worker)
+        return job.id
+
+    def getJob(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    # returns False if the job is unknown or already done
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.isDone():
+                return False
+
+            job.status = CANCELLED
+            job.end_time = time.time()
+            if job.process is not None:
+                job.process.terminate()
+            return True
+
+    # lock has to be acquired
+    def forgetDoneJobs(self):
+        done_jobs = [job_id for job_id, job in self.jobs.items() if job.isDone()]
+        for job_id in done_jobs[:max(0, len(done_jobs) - self.max_done_jobs)]:
+            del self.jobs[job_id]
+
+    def work(self):
+        context = multiprocessing.get_context()
+        while True:
+            job = self.queue.get()
+
+            with self.lock:
+                if job.status == CANCELLED:
+                    continue
+                receiver, sender = context.Pipe(duplex=False)
+                job.process = context.Process(target=runJob, args=(sender, job.fn, job.args), daemon=True)
+                job.process.start()
+                job.status = RUNNING
+                job.start_time = time.time()
+            sender.close()
+
+            # process ends with sent result, error or it is terminated by cancel()
+            wait([receiver, job.process.sentinel])
+            try:
+                status, value = receiver.recv()
+            except (EOFError, OSError):
+                status, value = FAILED, 'Job process ended unexpectedly.'
+            receiver.close()
+            job.process.join()
+
+            with self.lock:
+                job.process = None
+                if job.status == CANCELLED:
+                    continue
+                job.status = status
+                job.end_time = time.time()
+                if status == FINISHED:
+                    job.result = value
+                else:
+                    job.error = value
@@ -0,0 +1,95 @@
+from contextlib import contextmanager
+import functools
+import time
+import tracemalloc
+
+
+# wall time, CPU time (of the calling thread) and peak of Python memory allocations of named phases,
+# CPU time of child processes (e.g. solvers portfolio) is not included, only wall time covers their work
+# repeated calls of the phase are summed (peak memory is the maximum), nested calls of the same phase are ignored
+# hooks are called after every call of any phase with its name and measurement of this call:
+# hook(phase, {'wall_time': ..., 'cpu_time': ..., 'peak_memory': ...})
+class PhaseStats:
+    # trace_memory: measure peak memory with tracemalloc, it slows allocations down several times,
+    # memory allocated by native code (e.g. SAT solver) is not traced
+    def __init__(self, trace_memory=False, hooks=None):
+        self.trace_memory = trace_memory
+        self.hooks = list(hooks or [])
+        # phase name -> dict with keys 'wall_time', 'cpu_time', 'peak_memory' (bytes, None if not traced), 'calls'
+        self.phases = {}
+        self.active_phases = set()
+
+    def addHook(self, hook):
+        self.hooks.append(hook)
+
+    def removeHook(self, hook):
+        self.hooks.remove(hook)
+
+    @contextmanager
+    def measure(self, phase):
+        if phase in self.active_phases:
+            yield
+            return
+
+        self.active_phases.add(phase)
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            elif hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            start_memory, _ = tracemalloc.get_traced_memory()
+
+        start_cpu = time.thread_time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            measurement = {
+                'wall_time': time.perf_counter() - start,
+                'cpu_time': time.thread_time() - start_cpu,
+                'peak_memory': None
+            }
+            if self.trace_memory:
+                _, peak_memory = tracemalloc.get_traced_memory()
+                measurement['peak_memory'] = max(peak_memory - start_memory, 0)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.active_phases.discard(phase)
+
+            self.addMeasurement(phase, measurement)
+            for hook in self.hooks:
+                hook(phase, measurement)
+
+    def addMeasurement(self, phase, measurement):
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = {'wall_time': 0.0, 'cpu_time': 0.0, 'peak_memory': None, 'calls': 0}
+
+        stats['wall_time'] += measurement['wall_time']
+        stats['cpu_time'] += measurement['cpu_time']
+        if measurement['peak_memory'] is not None:
+            stats['peak_memory'] = max(stats['peak_memory'] or 0, measurement['peak_memory'])
+        stats['calls'] += 1
+
+    def getWallTime(self, *phases):
+        return sum(self.phases[phase]['wall_time'] for phase in phases or self.phases if phase in self.phases)
+
+    def reset(self):
+        self.phases = {}
+
+    # copy of statistics, it can be serialized to JSON
+    def toDict(self):
+        return {phase: dict(stats) for phase, stats in self.phases.items()}
+
+
+# method decorator, the whole call is measured as phase of self.phase_stats
+def measurePhase(phase):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.phase_stats.measure(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
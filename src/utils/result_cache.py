@@ -0,0 +1,126 @@
+from bparser.Tokenizer import Tokenizer
+from collections import OrderedDict
+from threading import Lock
+import hashlib
+import json
+import sqlite3
+import time
+
+# operators and parenthesis are normalized to token type, so 'a && b' and 'a and b' share one entry
+NORMALIZED_TOKENS = frozenset(['AND', 'OR', 'NOT', 'EQ', 'NEQ', 'LP', 'RP'])
+
+
+# formula is normalized on tokens level (whitespaces and operator aliases do not matter),
+# options: solver settings which change the result, e.g. solver name or interrupt time
+def getCacheKey(formula, **options):
+    tokens = [token_type if token_type in NORMALIZED_TOKENS else token
+              for token_type, token in Tokenizer(formula).iterTokens()]
+    content = json.dumps([tokens, sorted(options.items())], default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+# content-addressed cache of JSON serializable results
+# only serialized values are kept, every get returns new decoded copy, so callers can not change cached results
+# memory level is LRU bounded by number of entries and total size of serialized values,
+# optional SQLite file keeps entries between restarts and it is bounded by disk_max_entries
+class ResultCache:
+    def __init__(self, max_entries=1024, max_size=64 * 2**20, path=None, disk_max_entries=None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.disk_max_entries = disk_max_entries
+        self.lock = Lock()
+
+        # key -> serialized value
+        self.entries = OrderedDict()
+        self.size = 0
+
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+        self.connection = None
+        if path is not None:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, last_used REAL)')
+            self.connection.commit()
+
+    def get(self, key):
+        with self.lock:
+            serialized = self.entries.get(key)
+            if serialized is not None:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+            elif self.connection is not None:
+                row = self.connection.execute(
+                    'SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    self.connection.execute(
+                        'UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+                    self.connection.commit()
+                    serialized = row[0]
+                    self.putMemory(key, serialized)
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+
+            if serialized is None:
+                self.stats["misses"] += 1
+                return None
+
+        # decoded outside of the lock, value is a new object for every caller
+        return json.loads(serialized)
+
+    def put(self, key, value):
+        serialized = json.dumps(value)
+        with self.lock:
+            self.putMemory(key, serialized)
+
+            if self.connection is not None:
+                self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                        (key, serialized, time.time()))
+                if self.disk_max_entries is not None:
+                    self.connection.execute(
+                        'DELETE FROM results WHERE key NOT IN '
+                        '(SELECT key FROM results ORDER BY last_used DESC LIMIT ?)', (self.disk_max_entries,))
+                self.connection.commit()
+
+    # lock has to be acquired
+    def putMemory(self, key, serialized):
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+
+        # value bigger than the whole cache is not kept in memory
+        if len(serialized) > self.max_size:
+            return
+
+        self.entries[key] = serialized
+        self.size += len(serialized)
+
+        while len(self.entries) > self.max_entries or self.size > self.max_size:
+            _, old_serialized = self.entries.popitem(last=False)
+            self.size -= len(old_serialized)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            if self.connection is not None:
+                self.connection.execute('DELETE FROM results')
+                self.connection.commit()
+
+    def getStats(self):
+        with self.lock:
+            requests_num = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats,
+                        entries=len(self.entries),
+                        size=self.size,
+                        hit_ratio=self.stats["hits"] / requests_num if requests_num else 0.0)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -1,95 +1,176 @@
+# every term is a variable id, clauses are lists of signed ids (negative id means negated term)
+
+
+# number of clauses emitted for a single gate of given operator
+def getTseitinClausesNum(operator, operands_num=2):
+    if operator == 'NOT':
+        return 2
+    elif operator in ['XOR', 'XNOR', 'EQ', 'NEQ']:
+        return 4
+    return operands_num + 1
+
+
+# polarity of a gate in the formula, Plaisted-Greenbaum encoding emits only clauses of needed direction:
+# POSITIVE: c -> f(a, b), NEGATIVE: f(a, b) -> c, BOTH: c <-> f(a, b) (full Tseitin encoding)
+POSITIVE = 1
+NEGATIVE = 2
+BOTH = POSITIVE | NEGATIVE
+
 
 # conversion for 'and' operator
 # c <-> a and b => (!a or !b or c) and (a or !c) and (b or !c)
 
 
-def getTseitinAndClause(term_list):
+def getTseitinAndClause(term_list, polarity=BOTH):
     a, b, c = term_list
 
-    return [
-        [-1, a, -1, b, c],
-        [a, -1, c],
-        [b, -1, c]
-    ]
+    clauses = []
+    if polarity & NEGATIVE:
+        clauses.append([-a, -b, c])
+    if polarity & POSITIVE:
+        clauses.extend([[a, -c], [b, -c]])
+    return clauses
 
 # conversion for 'nand' operator
 # c <-> !(a and b) => (!a or !b or !c) and (a or c) and (b or c)
 
 
-def getTseitinNandClause(term_list):
+def getTseitinNandClause(term_list, polarity=BOTH):
     a, b, c = term_list
 
-    return [
-        [-1, a, -1, b, -1, c],
-        [a, c],
-        [b, c]
-    ]
+    clauses = []
+    if polarity & POSITIVE:
+        clauses.append([-a, -b, -c])
+    if polarity & NEGATIVE:
+        clauses.extend([[a, c], [b, c]])
+    return clauses
 
 # conversion for 'or' operator
 # c <-> a or b => (a or b or !c) and (!a or c) and (!b or c)
 
 
-def getTseitinOrClause(term_list):
+def getTseitinOrClause(term_list, polarity=BOTH):
     a, b, c = term_list
 
-    return [
-        [a, b, -1, c],
-        [-1, a, c],
-        [-1, b, c]
-    ]
+    clauses = []
+    if polarity & POSITIVE:
+        clauses.append([a, b, -c])
+    if polarity & NEGATIVE:
+        clauses.extend([[-a, c], [-b, c]])
+    return clauses
 
 # conversion for 'nor' operator
 # c <-> !(a or b) => (a or b or c) and (!a or !c) and (!b or !c)
 
 
-def getTseitinNorClause(term_list):
+def getTseitinNorClause(term_list, polarity=BOTH):
     a, b, c = term_list
 
-    return [
-        [a, b, c],
-        [-1, a, -1, c],
-        [-1, b, -1, c]
-    ]
+    clauses = []
+    if polarity & NEGATIVE:
+        clauses.append([a, b, c])
+    if polarity & POSITIVE:
+        clauses.extend([[-a, -c], [-b, -c]])
+    return clauses
 
 # conversion for 'not' operator
 # b <-> !a => (!a or !b) and (a or b)
 
 
-def getTseitinNotClause(term_list):
+def getTseitinNotClause(term_list, polarity=BOTH):
     a, b = term_list
 
-    return [
-        [-1, a, -1, b],
-        [a, b]
-    ]
+    clauses = []
+    if polarity & POSITIVE:
+        clauses.append([-a, -b])
+    if polarity & NEGATIVE:
+        clauses.append([a, b])
+    return clauses
 
 # conversion for 'xor' operator
 # c <-> a xor b => (!a or !b or !c) and (a or b or !c) and (a or !b or c) and (!a or b or c)
 
 
-def getTseitinXorClause(term_list):
+def getTseitinXorClause(term_list, polarity=BOTH):
     a, b, c = term_list
 
-    return [
-        [-1, a, -1, b, -1, c],
-        [a, b, -1, c],
-        [a, -1, b, c],
-        [-1, a, b, c]
-    ]
+    clauses = []
+    if polarity & POSITIVE:
+        clauses.extend([[-a, -b, -c], [a, b, -c]])
+    if polarity & NEGATIVE:
+        clauses.extend([[a, -b, c], [-a, b, c]])
+    return clauses
 
 # conversion for 'xnor' operator
 # c <-> a xnor b => (!a or !b or c) and (a or b or c) and (a or !b or !c) and (!a or b or !c)
 
 
-def getTseitinXnorClause(term_list):
+def getTseitinXnorClause(term_list, polarity=BOTH):
     a, b, c = term_list
 
-    return [
-        [-1, a, -1, b, c],
-        [a, b, c],
-        [a, -1, b, -1, c],
-        [-1, a, b, -1, c]
-    ]
+    clauses = []
+    if polarity & NEGATIVE:
+        clauses.extend([[-a, -b, c], [a, b, c]])
+    if polarity & POSITIVE:
+        clauses.extend([[a, -b, -c], [-a, b, -c]])
+    return clauses
+
+
+# conversion for n-ary 'and' operator, term_list contains operands and the gate variable as the last element
+# c <-> a1 and ... and ak => (!a1 or ... or !ak or c) and (a1 or !c) and ... and (ak or !c)
+
+
+def getTseitinNaryAndClause(term_list, polarity=BOTH):
+    operands, c = term_list[:-1], term_list[-1]
+
+    clauses = []
+    if polarity & NEGATIVE:
+        clauses.append([-a for a in operands] + [c])
+    if polarity & POSITIVE:
+        clauses.extend([[a, -c] for a in operands])
+    return clauses
+
+# conversion for n-ary 'nand' operator
+# c <-> !(a1 and ... and ak) => (!a1 or ... or !ak or !c) and (a1 or c) and ... and (ak or c)
+
+
+def getTseitinNaryNandClause(term_list, polarity=BOTH):
+    operands, c = term_list[:-1], term_list[-1]
+
+    clauses = []
+    if polarity & POSITIVE:
+        clauses.append([-a for a in operands] + [-c])
+    if polarity & NEGATIVE:
+        clauses.extend([[a, c] for a in operands])
+    return clauses
+
+# conversion for n-ary 'or' operator
+# c <-> a1 or ... or ak => (a1 or ... or ak or !c) and (!a1 or c) and ... and (!ak or c)
+
+
+def getTseitinNaryOrClause(term_list, polarity=BOTH):
+    operands, c = term_list[:-1], term_list[-1]
+
+    clauses = []
+    if polarity & POSITIVE:
+        clauses.append(operands + [-c])
+    if polarity & NEGATIVE:
+        clauses.extend([[-a, c] for a in operands])
+    return clauses
+
+# conversion for n-ary 'nor' operator
+# c <-> !(a1 or ... or ak) => (a1 or ... or ak or c) and (!a1 or !c) and ... and (!ak or !c)
+
+
+def getTseitinNaryNorClause(term_list, polarity=BOTH):
+    operands, c = term_list[:-1], term_list[-1]
+
+    clauses = []
+    if polarity & NEGATIVE:
+        clauses.append(operands + [c])
+    if polarity & POSITIVE:
+        clauses.extend([[-a, -c] for a in operands])
+    return clauses
 
 
 def getTseitinAndClauseStr(a, b, c):
@@ -0,0 +1,54 @@
+from concurrent.futures import ProcessPoolExecutor
+from threading import BoundedSemaphore, Lock
+import os
+
+
+# bounded pool of worker processes, CPU heavy work (parsing, encoding, solving) is moved out of request threads
+# at most max_workers tasks are running and max_queue_size are waiting, next tasks are rejected
+class WorkerPool:
+    def __init__(self, max_workers=None, max_queue_size=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue_size = self.max_workers * 2 if max_queue_size is None else max_queue_size
+        self.slots = BoundedSemaphore(self.max_workers + self.max_queue_size)
+        self.lock = Lock()
+        # processes are started on first use, so importing module (e.g. by WSGI server master) is cheap
+        self.executor = None
+
+        self.stats = {
+            "submitted": 0,
+            "rejected": 0
+        }
+
+    # returns Future or None if the pool is full
+    def trySubmit(self, fn, *args, **kwargs):
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.stats["rejected"] += 1
+            return None
+
+        try:
+            future = self.getExecutor().submit(fn, *args, **kwargs)
+        except Exception:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self.slots.release())
+        with self.lock:
+            self.stats["submitted"] += 1
+        return future
+
+    def getExecutor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self.executor
+
+    def getStats(self):
+        with self.lock:
+            return dict(self.stats, max_workers=self.max_workers, max_queue_size=self.max_queue_size)
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None